@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""Micro-benchmark of value assignment throughput.
+
+Compares walking the peers of a position with the generator based
+``line``/``column``/``region`` walk used before the peer tables were
+introduced against iterating the precomputed ``PEERS`` table.
+
+"""
+
+import itertools
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sudoku import PEERS, parse_input  # noqa
+
+
+def legacy_check(game, position, mask):
+    matrix = game.matrix
+
+    def line():
+        for other in matrix[position.i]:
+            if other != position:
+                yield other
+
+    def column():
+        for line in matrix:
+            if line[position.j] != position:
+                yield line[position.j]
+
+    def region():
+        start_i = position.i // 3 * 3
+        start_j = position.j // 3 * 3
+        for i in range(start_i, start_i + 3):
+            for j in range(start_j, start_j + 3):
+                if matrix[i][j] != position:
+                    yield matrix[i][j]
+
+    for peer in set(itertools.chain(line(), column(), region())):
+        if not peer._value and not peer.possibilities.mask & mask:
+            return False
+    return True
+
+
+def table_check(game, position, mask):
+    positions = game.positions
+    for index in PEERS[position.index]:
+        peer = positions[index]
+        if not peer._value and not peer.possibilities.mask & mask:
+            return False
+    return True
+
+
+def assign_all(game, check):
+    """Assign and remove every value, forward checking the peers first."""
+    for position in game.available_moves:
+        for value in range(1, 10):
+            check(game, position, ~(1 << value))
+            position.value = value
+            position.value = 0
+
+
+def main():
+    path = os.path.join(os.path.dirname(__file__), '..', 'entrada.txt')
+    with open(path) as file_obj:
+        games = parse_input(file_obj=file_obj)
+
+    for name, check in (('generators', legacy_check),
+                        ('tables', table_check)):
+        elapsed = min(timeit.repeat(
+            lambda: [assign_all(game, check) for game in games],
+            number=1, repeat=3))
+        assignments = sum(len(game.available_moves) * 9 for game in games)
+        print('%-10s %10.0f assignments/s' % (name, assignments / elapsed))
+
+
+if __name__ == '__main__':
+    main()
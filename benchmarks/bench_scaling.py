@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Benchmark how ``Game.solve`` scales with the size of the board.
+
+Random puzzles are generated for each box size (4x4, 9x9, 16x16 and
+25x25 boards by default), keeping the same fraction of givens, and
+solved with each configuration::
+
+    python benchmarks/bench_scaling.py --games 20 --givens 0.5
+
+For each board size and configuration the setup time (building the
+``Game``), the search time and the attempts are reported as the median
+of the games, with the number of games aborted. Configurations are the
+ones of ``bench_solve.py`` but numpy, which only solves 9x9 boards.
+
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_solve import CONFIGS, generate_puzzle  # noqa
+from sudoku import Board, Game, MaxAttemptsExceeded, percentile  # noqa
+
+CONFIGS = [(name, config) for name, config in CONFIGS
+           if config.get('engine') != 'numpy']
+
+
+def run(puzzles, options):
+    """Solve ``puzzles``, returning the record of each game."""
+    records = []
+
+    for i, puzzle in enumerate(puzzles):
+        start = time.perf_counter()
+        game = Game.from_string(puzzle, **options)
+        setup = time.perf_counter() - start
+
+        status = 'solved'
+        try:
+            game.solve()
+        except MaxAttemptsExceeded:
+            status = 'aborted'
+
+        records.append({
+            'game': i + 1,
+            'status': status,
+            'attempts': game.attempts_count,
+            'setup': setup,
+            'time': time.perf_counter() - start - setup,
+        })
+
+    return records
+
+
+def summarize(records):
+    return {
+        'games': len(records),
+        'setup': percentile([record['setup'] for record in records], 50),
+        'time': percentile([record['time'] for record in records], 50),
+        'attempts': percentile([record['attempts'] for record in records],
+                               50),
+        'aborted': sum(record['status'] == 'aborted' for record in records),
+    }
+
+
+def parse_options():
+    optparser = OptionParser(usage='%prog [options]')
+
+    optparser.add_option("--box-size", dest="box_sizes", default=[],
+                         action="append", type="int",
+                         help=("Box size of the boards to solve. Can be "
+                               "given many times. Defaults to 2 to 5"))
+    optparser.add_option("--games", dest="games", default=10, type="int",
+                         help="Puzzles generated for each board size")
+    optparser.add_option("--givens", dest="givens", default=0.5,
+                         type="float",
+                         help="Fraction of the positions given by puzzles")
+    optparser.add_option("--seed", dest="seed", default=0, type="int",
+                         help="Seed used to generate puzzles")
+    optparser.add_option("--config", dest="configs", default=[],
+                         action="append", type="choice",
+                         choices=[name for name, options in CONFIGS],
+                         help=("Configuration to run: %s. Can be given "
+                               "many times. Defaults to mrv-fc, propagate "
+                               "and dlx" %
+                               ', '.join(name for name, options in CONFIGS)))
+    optparser.add_option("--max-attempts", dest="max_attempts",
+                         default=10**5, type="int",
+                         help=("Attempts before giving up a game. Defaults "
+                               "to 10^5, as large boards without "
+                               "propagation may take long"))
+    optparser.add_option("-o", "--output", dest="output", default=None,
+                         metavar="FILE",
+                         help="Write the results as JSON to FILE")
+
+    return optparser.parse_args()[0]
+
+
+def main():
+    options = parse_options()
+    names = options.configs or ['mrv-fc', 'propagate', 'dlx']
+
+    results = {}
+    for box_size in options.box_sizes or [2, 3, 4, 5]:
+        cells = Board.get(box_size).cells
+        rng = random.Random(options.seed)
+        puzzles = [generate_puzzle(rng, int(cells * options.givens),
+                                   box_size)
+                   for i in range(options.games)]
+
+        board = '%sx%s' % (box_size ** 2, box_size ** 2)
+        results[board] = {}
+        for name, config in CONFIGS:
+            if name not in names:
+                continue
+
+            config = dict(config, max_attempts=options.max_attempts)
+            records = run(puzzles, config)
+            summary = summarize(records)
+            results[board][name] = {'summary': summary, 'games': records}
+            print('%-6s %-18s setup %8.4fs search %8.4fs %8s attempts '
+                  '%3s aborted' % (board, name, summary['setup'],
+                                   summary['time'], summary['attempts'],
+                                   summary['aborted']))
+
+    if options.output:
+        with open(options.output, 'w') as file_obj:
+            json.dump(results, file_obj, indent=2, sort_keys=True)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Benchmark the cost of setting up games, before any search.
+
+Random puzzles are generated and turned into games in each mode::
+
+    python benchmarks/bench_setup.py --games 100000
+
+``parse`` keeps every game of the batch, like ``parse_input``.
+``iter`` builds a new game per puzzle, like ``iter_games``. ``reset``
+reuses a single game with ``Game.reset``. Each mode runs in a new
+process, so its peak RSS isn't inflated by the previous ones. The
+median and mean setup time per puzzle are reported, along with the
+peak RSS and how much it grew over the RSS after generating the
+puzzles.
+
+"""
+
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_solve import generate_puzzle  # noqa
+from sudoku import Game, percentile  # noqa
+
+MODES = ('parse', 'iter', 'reset')
+
+
+def peak_rss():
+    """Return the peak RSS of the process in MiB."""
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale /
+            float(1 << 20))
+
+
+def run(mode, games, givens, seed):
+    """Set up the games of a batch in ``mode``, returning the setup time
+    of each one and the RSS before and after."""
+    rng = random.Random(seed)
+    puzzles = [generate_puzzle(rng, givens) for i in range(games)]
+    base_rss = peak_rss()
+
+    times = []
+    kept = []
+    game = None
+    for puzzle in puzzles:
+        start = time.perf_counter()
+        if mode == 'reset' and game is not None:
+            game.reset(puzzle)
+        else:
+            game = Game.from_string(puzzle)
+        times.append(time.perf_counter() - start)
+
+        if mode == 'parse':
+            kept.append(game)
+
+    return times, base_rss, peak_rss()
+
+
+def parse_options():
+    optparser = OptionParser(usage='%prog [options]')
+
+    optparser.add_option("--games", dest="games", default=100000,
+                         type="int",
+                         help="Puzzles generated. Defaults to 100000")
+    optparser.add_option("--givens", dest="givens", default=30, type="int",
+                         help="Values given by generated puzzles")
+    optparser.add_option("--seed", dest="seed", default=0, type="int",
+                         help="Seed used to generate puzzles")
+    optparser.add_option("--mode", dest="modes", default=[],
+                         action="append", type="choice", choices=MODES,
+                         help=("Mode to run: %s. Can be given many times. "
+                               "Defaults to all of them" % ', '.join(MODES)))
+
+    return optparser.parse_args()[0]
+
+
+def main():
+    options = parse_options()
+    context = multiprocessing.get_context('spawn')
+
+    for mode in options.modes or MODES:
+        pool = context.Pool(1)
+        try:
+            times, base_rss, rss = pool.apply(
+                run, (mode, options.games, options.givens, options.seed))
+        finally:
+            pool.terminate()
+            pool.join()
+
+        times.sort()
+        print('%-6s setup median %6.1fus mean %6.1fus, peak RSS %8.1f MiB '
+              '(%+8.1f MiB)' % (mode, percentile(times, 50) * 1e6,
+                                sum(times) / len(times) * 1e6, rss,
+                                rss - base_rss))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+"""Benchmark ``Game.solve`` with every heuristic and engine combination.
+
+Each game of each corpus is solved with each configuration, recording
+the attempts, the wall time and the peak memory (measured with
+``tracemalloc`` on a second run, so it doesn't slow down the timed one)
+per game. The results are written as JSON and, given a baseline saved
+by a previous run, compared with it::
+
+    python benchmarks/bench_solve.py --save baseline.json
+    python benchmarks/bench_solve.py --baseline baseline.json \\
+        --threshold 0.1
+
+A configuration is reported as a regression, and the command exits with
+status 1, when its total attempts, time or peak memory for a corpus
+grows more than the threshold over the baseline.
+
+Besides ``entrada.txt`` (or the files given with ``--corpus``), a corpus
+of random puzzles can be generated with ``--generate``. ``--results``
+writes the logs and solutions of every run like the ones in
+``results/``.
+
+"""
+
+import io
+import json
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sudoku import (Game, MaxAttemptsExceeded, MAX_ATTEMPTS_MESSAGE,  # noqa
+                    VALUE_CHARS, numpy, open_puzzles, percentile,
+                    propagate_batch)
+
+CONFIGS = [
+    ('noprune', {}),
+    ('fc', {'forward_check': True}),
+    ('mrv', {'mrv': True}),
+    ('mrv-fc', {'mrv': True, 'forward_check': True}),
+    ('propagate', {'mrv': True, 'forward_check': True, 'propagate': True}),
+    ('locked-candidates', {'mrv': True, 'forward_check': True,
+                           'locked_candidates': True}),
+    ('backjump', {'backjump': True}),
+    ('fc-backjump', {'forward_check': True, 'backjump': True}),
+    ('mrv-backjump', {'mrv': True, 'backjump': True}),
+    ('mrv-fc-backjump', {'mrv': True, 'forward_check': True,
+                         'backjump': True}),
+    ('mrv-fc-lcv', {'mrv': True, 'forward_check': True,
+                    'value_order': 'lcv'}),
+    ('mrv-fc-random', {'mrv': True, 'forward_check': True,
+                       'value_order': 'random', 'seed': 1}),
+    ('mrv-fc-luby', {'mrv': True, 'forward_check': True,
+                     'value_order': 'random', 'seed': 1, 'restarts': 'luby'}),
+    ('mrv-fc-geometric', {'mrv': True, 'forward_check': True,
+                          'value_order': 'random', 'seed': 1,
+                          'restarts': 'geometric'}),
+    ('dlx', {'engine': 'dlx'}),
+    ('numpy', {'engine': 'numpy', 'mrv': True, 'forward_check': True}),
+]
+
+LOG_FORMAT = '%(levelname)s:%(name)s:%(message)s'
+
+
+def generate_puzzle(rng, givens, box_size=3):
+    """Return a random puzzle with ``givens`` values of a random grid.
+
+    The grid is a shuffled copy of a pattern known to be valid. The
+    puzzle may have more than one solution.
+
+    """
+    size = box_size * box_size
+
+    def shuffled(groups):
+        return [item for group in rng.sample(groups, box_size)
+                for item in rng.sample(group, box_size)]
+
+    bands = [list(range(start, start + box_size))
+             for start in range(0, size, box_size)]
+    lines = shuffled(bands)
+    columns = shuffled(bands)
+    digits = rng.sample(range(1, size + 1), size)
+
+    grid = [digits[(i // box_size + i % box_size * box_size + j) % size]
+            for i in lines for j in columns]
+    for index in rng.sample(range(size * size), size * size - givens):
+        grid[index] = 0
+
+    return ''.join(VALUE_CHARS[value] for value in grid)
+
+
+def load_corpus(path):
+    with open(path) as file_obj:
+        return list(open_puzzles(file_obj)[1])
+
+
+def solve(puzzle, game_id, options):
+    """Solve a puzzle, returning the game and the search status."""
+    options = dict(options)
+    if options.get('engine') == 'numpy':
+        options['engine'] = 'backtrack'
+        if puzzle is None:
+            return None, 'solved'
+
+    game = Game.from_string(puzzle, **options)
+    game.id = game_id
+
+    try:
+        game.solve()
+    except MaxAttemptsExceeded:
+        return game, 'aborted'
+
+    if '0' in game.to_string():
+        return game, 'unsolved'
+    return game, 'solved'
+
+
+def run(puzzles, options, memory=True, log=None):
+    """Solve ``puzzles`` and return the record of each game.
+
+    With the numpy engine the puzzles are propagated in a single batch,
+    which time is reported apart, and only the ones left are searched.
+
+    """
+    batch_time = 0
+    if options.get('engine') == 'numpy':
+        start = time.perf_counter()
+        propagated, statuses = propagate_batch(puzzles)
+        batch_time = time.perf_counter() - start
+        puzzles = [None if status is True else puzzle
+                   for puzzle, status in zip(propagated, statuses)]
+    else:
+        propagated = puzzles
+
+    records = []
+    outputs = []
+    for i, puzzle in enumerate(puzzles):
+        start = time.perf_counter()
+        game, status = solve(puzzle, i + 1, options)
+        elapsed = time.perf_counter() - start
+
+        records.append({
+            'game': i + 1,
+            'status': status,
+            'attempts': game.attempts_count if game else 0,
+            'time': elapsed,
+        })
+
+        if log is not None:
+            if status == 'aborted':
+                outputs.append(MAX_ATTEMPTS_MESSAGE)
+            elif game is None:
+                outputs.append(str(Game.from_string(propagated[i])))
+            else:
+                outputs.append(str(game))
+
+    if memory:
+        tracemalloc.start()
+        try:
+            for i, puzzle in enumerate(puzzles):
+                tracemalloc.reset_peak()
+                current = tracemalloc.get_traced_memory()[0]
+                solve(puzzle, i + 1, options)
+                peak = tracemalloc.get_traced_memory()[1]
+                records[i]['peak_memory'] = peak - current
+        finally:
+            tracemalloc.stop()
+
+    return batch_time, records, outputs
+
+
+def summarize(batch_time, records):
+    summary = {
+        'games': len(records),
+        'attempts': sum(record['attempts'] for record in records),
+        'time': batch_time + sum(record['time'] for record in records),
+        'aborted': sum(record['status'] == 'aborted' for record in records),
+        'p99_attempts': percentile(sorted(record['attempts']
+                                          for record in records), 99),
+        'p99_time': percentile(sorted(record['time'] for record in records),
+                               99),
+    }
+    if batch_time:
+        summary['batch_time'] = batch_time
+    if records and 'peak_memory' in records[0]:
+        summary['peak_memory'] = max(record['peak_memory']
+                                     for record in records)
+    return summary
+
+
+def compare(results, baseline, threshold):
+    """Print the change of each total and return the regressions."""
+    regressions = []
+
+    for corpus, configs in sorted(results.items()):
+        for name, result in sorted(configs.items()):
+            try:
+                previous = baseline[corpus][name]['summary']
+            except KeyError:
+                continue
+
+            changes = []
+            for key in ('attempts', 'time', 'p99_attempts', 'p99_time',
+                        'peak_memory'):
+                old = previous.get(key)
+                new = result['summary'].get(key)
+                if not old or new is None:
+                    continue
+
+                change = (new - old) / float(old)
+                changes.append('%s %+.1f%%' % (key, change * 100))
+                if change > threshold:
+                    regressions.append((corpus, name, key, old, new))
+
+            print('%-12s %-18s %s' % (corpus, name, ', '.join(changes)))
+
+    return regressions
+
+
+def parse_options():
+    optparser = OptionParser(usage='%prog [options]')
+
+    optparser.add_option("--corpus", dest="corpora", default=[],
+                         action="append", metavar="FILE",
+                         help=("Puzzles to solve, in grid or line format. "
+                               "Can be given many times. Defaults to "
+                               "entrada.txt"))
+    optparser.add_option("--generate", dest="generate", default=0,
+                         type="int", metavar="N",
+                         help="Also solve N random puzzles")
+    optparser.add_option("--givens", dest="givens", default=25, type="int",
+                         help="Values given by generated puzzles")
+    optparser.add_option("--seed", dest="seed", default=0, type="int",
+                         help="Seed used to generate puzzles")
+    optparser.add_option("--config", dest="configs", default=[],
+                         action="append", type="choice",
+                         choices=[name for name, options in CONFIGS],
+                         help=("Configuration to run: %s. Can be given "
+                               "many times. Defaults to all of them" %
+                               ', '.join(name for name, options in CONFIGS)))
+    optparser.add_option("--max-attempts", dest="max_attempts",
+                         default=10**6, type="int",
+                         help="Attempts before giving up a game")
+    optparser.add_option("--no-memory", dest="memory", default=True,
+                         action="store_false",
+                         help="Don't measure the peak memory")
+    optparser.add_option("-o", "--output", dest="output", default=None,
+                         metavar="FILE",
+                         help="Write the results as JSON to FILE")
+    optparser.add_option("--save", dest="save", default=None, metavar="FILE",
+                         help="Same as --output, meant for baselines")
+    optparser.add_option("--baseline", dest="baseline", default=None,
+                         metavar="FILE",
+                         help="Compare the results with a previous run")
+    optparser.add_option("--threshold", dest="threshold", default=0.1,
+                         type="float",
+                         help=("Relative growth over the baseline reported "
+                               "as a regression. Defaults to 0.1"))
+    optparser.add_option("--results", dest="results", default=None,
+                         metavar="DIR",
+                         help="Write log-*.txt and saida-*.txt files to DIR")
+
+    return optparser.parse_args()[0]
+
+
+def main():
+    options = parse_options()
+
+    corpora = []
+    for path in options.corpora or [
+            os.path.join(os.path.dirname(__file__), '..', 'entrada.txt')]:
+        name = os.path.splitext(os.path.basename(path))[0]
+        corpora.append((name, load_corpus(path)))
+
+    if options.generate:
+        rng = random.Random(options.seed)
+        corpora.append(('generated', [
+            generate_puzzle(rng, options.givens)
+            for i in range(options.generate)]))
+
+    configs = [(name, config) for name, config in CONFIGS
+               if not options.configs or name in options.configs]
+    if numpy is None:
+        configs = [(name, config) for name, config in configs
+                   if config.get('engine') != 'numpy']
+
+    results = {}
+    for corpus, puzzles in corpora:
+        results[corpus] = {}
+        for name, config in configs:
+            config = dict(config, max_attempts=options.max_attempts)
+
+            log = None
+            if options.results:
+                log = io.StringIO()
+                handler = logging.StreamHandler(log)
+                handler.setFormatter(logging.Formatter(LOG_FORMAT))
+                logging.root.addHandler(handler)
+                logging.root.setLevel(logging.INFO)
+
+            try:
+                batch_time, records, outputs = run(
+                    puzzles, config, options.memory, log)
+            finally:
+                if log is not None:
+                    logging.root.removeHandler(handler)
+                    logging.root.setLevel(logging.WARNING)
+
+            summary = summarize(batch_time, records)
+            results[corpus][name] = {'summary': summary, 'games': records}
+            print('%-12s %-18s %10s attempts %8.2fs %3s aborted, p99 %8s '
+                  'attempts %6.2fs' % (
+                      corpus, name, summary['attempts'], summary['time'],
+                      summary['aborted'], summary['p99_attempts'],
+                      summary['p99_time']))
+
+            if log is not None:
+                suffix = name if corpus == 'entrada' else corpus + '-' + name
+                path = os.path.join(options.results, 'log-%s.txt' % suffix)
+                with open(path, 'w') as file_obj:
+                    file_obj.write(log.getvalue())
+                path = os.path.join(options.results, 'saida-%s.txt' % suffix)
+                with open(path, 'w') as file_obj:
+                    file_obj.writelines(output + '\n' for output in outputs)
+
+    for path in (options.output, options.save):
+        if path:
+            with open(path, 'w') as file_obj:
+                json.dump(results, file_obj, indent=2, sort_keys=True)
+
+    if options.baseline:
+        with open(options.baseline) as file_obj:
+            baseline = json.load(file_obj)
+
+        regressions = compare(results, baseline, options.threshold)
+        for corpus, name, key, old, new in regressions:
+            print('Regression on %s %s: %s went from %s to %s' % (
+                corpus, name, key, old, new))
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,434 +1,3914 @@
 #!/usr/bin/env python
 
+import asyncio
+import bisect
+import collections
+import concurrent.futures
 import itertools
+import json
 import logging
+import math
+import mmap
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import socket
+import sqlite3
+import stat
 import sys
 import time
 
 from optparse import OptionParser
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+#: Printed instead of the solution when a game exceeds MAX_ATTEMPTS.
+MAX_ATTEMPTS_MESSAGE = 'Numero de atribuicoes excede limite maximo\n'
+
+#: Printed instead of the solution when a game exceeds its time limit.
+TIME_LIMIT_MESSAGE = 'Tempo limite excedido\n'
+
+#: Sent by ``SolverServer`` instead of the solution of invalid puzzles.
+INVALID_PUZZLE_MESSAGE = 'Jogo invalido\n'
+
+#: Number of puzzles sent at once to each worker process.
+JOBS_CHUNKSIZE = 4
+
+#: Number of one line puzzles decoded at once from a memory-mapped file.
+MMAP_CHUNKSIZE = 4096
+
+#: Number of puzzles propagated at once by the numpy engine.
+NUMPY_BATCHSIZE = 4096
+
+#: Number of puzzles sent at once to a worker by ``SolverServer``.
+SERVE_BATCHSIZE = 64
+
+#: Seconds ``SolverServer`` waits for a batch to fill before sending it.
+SERVE_BATCH_DELAY = 0.002
+
+#: Number of puzzles ``SolverServer`` takes before it stops reading.
+SERVE_MAX_PENDING = 1024
+
+#: Attempts between two checks of the clock against a time limit.
+TIME_CHECK_INTERVAL = 1024
+
+#: Attempts searched at a time by ``Game.solve_steps``.
+SLICE_SIZE = 1000
+
+#: Games searched at once by ``solve_interleaved``.
+SCHEDULE_IN_FLIGHT = 16
+
+#: Turns of ``solve_interleaved`` between two slices of demoted games.
+LOW_LANE_INTERVAL = 8
+
+#: Branches per process the top of the search tree is split into by
+#: ``Game.solve_split``.
+SPLIT_FACTOR = 4
+
+#: Attempts searched on a branch by ``Game.solve_split`` before it is
+#: split again.
+SPLIT_BUDGET = 20000
+
+#: Attempts before the first restart of a search, see ``restart_cutoff``.
+RESTART_UNIT = 100
+
+#: Growth of the attempts between restarts with the geometric policy.
+RESTART_FACTOR = 1.5
+
+#: Number of puzzles kept in memory by ``SolutionCache``.
+CACHE_SIZE = 100000
+
+#: Stores written to the ``SolutionCache`` database between commits.
+CACHE_COMMIT_INTERVAL = 1000
+
+#: Orders of lines and columns tried by ``canonical_form``.
+CANONICAL_TIE_LIMIT = 256
+
 
 class MaxAttemptsExceeded(Exception):
     pass
 
 
+class TimeLimitExceeded(Exception):
+    pass
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+def next_check(count, limit=0, deadline=None):
+    """Return the count of attempts at which limits must be checked again.
+
+    That is as soon as ``count`` exceeds ``limit`` (if greater than zero)
+    or, if there is a ``deadline``, after ``TIME_CHECK_INTERVAL``
+    attempts, so the clock isn't read on each one.
+
+    """
+    checks = [float('inf')]
+    if limit > 0:
+        checks.append(limit + 1)
+    if deadline is not None:
+        checks.append(count + TIME_CHECK_INTERVAL)
+    return min(checks)
+
+
+#: Characters of the values in puzzle strings: ``0`` for blank positions,
+#: then the digits and, on boards with more than 9 values, the letters.
+VALUE_CHARS = '0123456789ABCDEFGHIJKLMNOP'
+
+#: Value of each character in a puzzle, also accepting ``.`` as blank.
+CHAR_VALUES = dict(
+    [(char, value) for value, char in enumerate(VALUE_CHARS)] +
+    [(char.lower(), value) for value, char in enumerate(VALUE_CHARS)] +
+    [('.', 0)])
+
+#: Largest box size, so values fit ``VALUE_CHARS``.
+MAX_BOX_SIZE = 5
+
+#: Boards with up to this many values keep ``bit_count`` and
+#: ``lowest_value`` as tables of every mask. Larger ones compute them.
+MASK_TABLE_VALUES = 16
+
+
+class MaskTable(object):
+    """Computes ``function(mask)`` when indexed, like the tuples of masks
+    too large to be built."""
+
+    def __init__(self, function):
+        self.function = function
+
+    def __getitem__(self, mask):
+        return self.function(mask)
+
+
+def _bit_count(mask):
+    return bin(mask).count('1')
+
+
+# Python 3.10 counts bits natively
+_bit_count = getattr(int, 'bit_count', _bit_count)
+
+
+def _lowest_value(mask):
+    return (mask & -mask).bit_length() - 1
+
+
+def _build_intersections(lines, columns, regions):
+    intersections = []
+
+    for region in regions:
+        for unit in lines + columns:
+            common = tuple(index for index in region if index in unit)
+            if not common:
+                continue
+
+            intersections.append((
+                common,
+                tuple(index for index in region if index not in common),
+                tuple(index for index in unit if index not in common)))
+
+    return tuple(intersections)
+
+
+class Board(object):
+    """Index tables of games with ``box_size`` by ``box_size`` regions.
+
+    Those games have ``size`` (the square of ``box_size``) lines,
+    columns and regions, each holding the values 1 to ``size``. Value
+    ``v`` is stored in bit ``v`` of a mask, so ``all_values`` has every
+    bit but bit 0 set. The tables are the same for every game of a size,
+    so they are built once by ``get``:
+
+    - ``lines``, ``columns`` and ``regions`` hold the position indices
+      (``i * size + j``) of each unit.
+    - ``units`` holds the (line, column, region) indices of each
+      position and ``peers`` the positions sharing a unit with it.
+      ``line_peers``, ``column_peers`` and ``region_peers`` split the
+      peers by unit.
+    - ``intersections`` holds the intersections of a region with a line
+      or a column, as tuples of (common positions, rest of the region,
+      rest of the line or column).
+    - ``bit_count`` and ``lowest_value`` give the number of values and
+      the smallest value of a mask, indexed by the mask.
+
+    """
+
+    boards = {}
+
+    def __init__(self, box_size):
+        size = box_size * box_size
+        self.box_size = box_size
+        self.size = size
+        self.cells = size * size
+        self.all_values = (1 << (size + 1)) - 2
+
+        if size <= MASK_TABLE_VALUES:
+            masks = range(self.all_values + 1)
+            self.bit_count = tuple(_bit_count(mask) for mask in masks)
+            self.lowest_value = tuple(_lowest_value(mask) for mask in masks)
+        else:
+            self.bit_count = MaskTable(_bit_count)
+            self.lowest_value = MaskTable(_lowest_value)
+
+        self.lines = tuple(tuple(i * size + j for j in range(size))
+                           for i in range(size))
+        self.columns = tuple(tuple(i * size + j for i in range(size))
+                             for j in range(size))
+        starts = range(0, size, box_size)
+        self.regions = tuple(
+            tuple((start_i + i) * size + start_j + j
+                  for i in range(box_size) for j in range(box_size))
+            for start_i in starts for start_j in starts)
+
+        self.units = tuple(
+            (index // size, index % size,
+             index // (size * box_size) * box_size +
+             index % size // box_size)
+            for index in range(self.cells))
+
+        line_peers = []
+        column_peers = []
+        region_peers = []
+        peers = []
+
+        for index, (i, j, k) in enumerate(self.units):
+            line_peers.append(tuple(p for p in self.lines[i] if p != index))
+            column_peers.append(tuple(p for p in self.columns[j]
+                                      if p != index))
+            region_peers.append(tuple(p for p in self.regions[k]
+                                      if p != index))
+            peers.append(tuple(sorted(set(line_peers[-1] + column_peers[-1] +
+                                          region_peers[-1]))))
+
+        self.line_peers = tuple(line_peers)
+        self.column_peers = tuple(column_peers)
+        self.region_peers = tuple(region_peers)
+        self.peers = tuple(peers)
+        self.intersections = _build_intersections(self.lines, self.columns,
+                                                  self.regions)
+
+    @classmethod
+    def get(cls, box_size=3):
+        """Return the ``Board`` of ``box_size``, building it once."""
+        board = cls.boards.get(box_size)
+        if board is None:
+            if not 1 < box_size <= MAX_BOX_SIZE:
+                raise ValueError('Invalid box size %s' % box_size)
+            board = cls.boards[box_size] = cls(box_size)
+        return board
+
+    def __repr__(self):
+        return 'Board(%s)' % self.box_size
+
+
+def box_size_for(size):
+    """Return the box size of games with ``size`` values per line, or
+    ``None`` if there's no such board."""
+    box_size = int(round(size ** 0.5))
+    if 1 < box_size <= MAX_BOX_SIZE and box_size * box_size == size:
+        return box_size
+
+
+def puzzle_box_size(length):
+    """Return the box size of puzzle strings of ``length`` values, or
+    ``None`` if there's no such board."""
+    size = int(round(length ** 0.5))
+    if size * size == length:
+        return box_size_for(size)
+
+
+def parse_value(value):
+    """Return the value of a position given as a number or a character
+    of ``VALUE_CHARS``."""
+    try:
+        return CHAR_VALUES[value]
+    except (KeyError, TypeError):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid value %r' % value)
+
+
+#: The tables of 9x9 games.
+BOARD = Board.get(3)
+
+#: Mask with the bits of every value (1 to 9) set. Value ``v`` is stored
+#: in bit ``v`` so bit 0 is never used.
+ALL_VALUES = BOARD.all_values
+
+#: Number of values stored in a mask, indexed by the mask.
+BIT_COUNT = BOARD.bit_count
+
+#: Smallest value stored in a mask, indexed by the mask.
+LOWEST_VALUE = BOARD.lowest_value
+
+#: The tables of ``BOARD``, see ``Board``.
+LINES, COLUMNS, REGIONS = BOARD.lines, BOARD.columns, BOARD.regions
+UNITS, PEERS = BOARD.units, BOARD.peers
+LINE_PEERS, COLUMN_PEERS = BOARD.line_peers, BOARD.column_peers
+REGION_PEERS = BOARD.region_peers
+INTERSECTIONS = BOARD.intersections
+
+
+def mask_to_set(mask):
+    return {value for value in range(1, mask.bit_length())
+            if mask & (1 << value)}
+
+
+def set_to_mask(values):
+    mask = 0
+    for value in values:
+        mask |= 1 << value
+    return mask
+
+
+class MaskSet(set):
+    """A ``set`` view of a values mask.
+
+    Changes made to the view are written back to the mask through the
+    ``store`` callable. Only kept for compatibility, the search never
+    builds these views.
+
+    """
+
+    def __init__(self, mask, store):
+        set.__init__(self, mask_to_set(mask))
+        self._store = store
+
+    def _write(self):
+        self._store(set_to_mask(self))
+
+    def add(self, value):
+        set.add(self, value)
+        self._write()
+
+    def remove(self, value):
+        set.remove(self, value)
+        self._write()
+
+    def discard(self, value):
+        set.discard(self, value)
+        self._write()
+
+    def clear(self):
+        set.clear(self)
+        self._write()
+
+
+class UnitMasks(object):
+    """Values still available in every line, column and region of a game.
+
+    Each unit is a mask (see ``Board.all_values``) shared by all the
+    positions on it, so placing a value is a single mask update per unit.
+
+    """
+
+    def __init__(self, board=BOARD):
+        self.board = board
+        self.line = [board.all_values] * board.size
+        self.column = [board.all_values] * board.size
+        self.region = [board.all_values] * board.size
+
+
 class Possibilities(object):
     """Stores available possibilities for a position.
 
-    Possibilities for column, line and region are stored in separated
-    structures. Possibilities already attempted are also kept in an
-    attribute the ``tested``.
+    Possibilities for column, line and region are stored as bitmasks in
+    a ``UnitMasks`` shared by the whole game. Possibilities already
+    attempted are kept in the ``tested_mask`` attribute.
+
+    The difference between ``tested_mask`` and the intersection of
+    ``column``, ``line`` and ``region`` give the current available
+    possibilities.
+
+    This class also implements the iterator pattern always returning
+    the first possibility available, or the one chosen by ``order`` if
+    set. This possibility is also added ``tested_mask``.
+
+    """
+
+    __slots__ = ('units', 'line_index', 'column_index', 'region_index',
+                 'tested_mask', 'excluded_mask', 'order')
+
+    def __init__(self, units=None, i=0, j=0):
+        if units is None:
+            units = UnitMasks()
+
+        self.units = units
+        self.line_index = i
+        self.column_index = j
+        self.region_index = units.board.units[i * units.board.size + j][2]
+        self.tested_mask = 0
+        self.excluded_mask = 0
+        # Chooses the value returned by next, see ValueOrder
+        self.order = None
+
+    def _unit_property(name, index_name):
+        def getter(self):
+            masks = getattr(self.units, name)
+            index = getattr(self, index_name)
+            return MaskSet(masks[index],
+                           lambda mask: masks.__setitem__(index, mask))
+
+        def setter(self, values):
+            masks = getattr(self.units, name)
+            masks[getattr(self, index_name)] = set_to_mask(values)
+
+        return property(getter, setter)
+
+    line = _unit_property('line', 'line_index')
+    column = _unit_property('column', 'column_index')
+    region = _unit_property('region', 'region_index')
+
+    del _unit_property
+
+    @property
+    def tested(self):
+        return MaskSet(self.tested_mask,
+                       lambda mask: setattr(self, 'tested_mask', mask))
+
+    @tested.setter
+    def tested(self, values):
+        self.tested_mask = set_to_mask(values)
+
+    @property
+    def mask(self):
+        units = self.units
+        return (units.line[self.line_index] &
+                units.column[self.column_index] &
+                units.region[self.region_index] &
+                ~(self.tested_mask | self.excluded_mask))
+
+    @property
+    def available(self):
+        return mask_to_set(self.mask)
+
+    def __len__(self):
+        return self.units.board.bit_count[self.mask]
+
+    def _to_list(self):
+        return sorted(self.available)
+
+    def next(self):
+        mask = self.mask
+
+        # If no possibilities are available raise StopIteration
+        #   to stop the for loop
+        if not mask:
+            raise StopIteration
+
+        if self.order is None:
+            possibility = (mask & -mask).bit_length() - 1
+        else:
+            possibility = self.order.choose(self, mask)
+        self.tested_mask |= 1 << possibility
+        return possibility
+
+    def __next__(self):
+        return self.next()
+
+    def __iter__(self):
+        return self
+
+    def __str__(self):
+        logging.debug('Line possibilities: %s', self.line)
+        logging.debug('Column possibilities: %s', self.column)
+        logging.debug('Region possibilities: %s', self.region)
+        return str(self._to_list())
+
+    def __repr__(self):
+        return str(self)
+
+
+class ValueOrder(object):
+    """Chooses the value ``Possibilities.next`` tries next.
+
+    ``Possibilities`` without an ``order`` try the lowest value first.
+
+    """
+
+    def choose(self, possibilities, mask):
+        """Return one of the values of ``mask``, left to
+        ``possibilities``."""
+        return (mask & -mask).bit_length() - 1
+
+
+class LeastConstrainingValue(ValueOrder):
+    """Tries first the value left to the fewest empty peers, ruling out
+    the fewest of their possibilities."""
+
+    def __init__(self, game):
+        self.game = game
+
+    def choose(self, possibilities, mask):
+        game = self.game
+        positions = game.positions
+        index = (possibilities.line_index * game.board.size +
+                 possibilities.column_index)
+        peer_masks = [positions[peer].possibilities.mask
+                      for peer in game.board.peers[index]
+                      if not positions[peer]._value]
+
+        best = best_count = None
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            count = sum(1 for peer_mask in peer_masks if peer_mask & bit)
+            if best is None or count < best_count:
+                best, best_count = bit, count
+
+        return best.bit_length() - 1
+
+
+class RandomValue(ValueOrder):
+    """Tries the values in a random order, given by ``seed``."""
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    def choose(self, possibilities, mask):
+        for i in range(self.random.randrange(_bit_count(mask))):
+            mask &= mask - 1
+        return (mask & -mask).bit_length() - 1
+
+
+#: Value orders of ``Game``, built from the game and its seed.
+VALUE_ORDERS = {
+    'lowest': lambda game, seed: None,
+    'lcv': lambda game, seed: LeastConstrainingValue(game),
+    'random': lambda game, seed: RandomValue(seed),
+}
+
+
+def luby(i):
+    """Return the ``i``-th term (from 1) of the Luby sequence: 1, 1, 2,
+    1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8..."""
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
+def restart_cutoff(policy, restarts, unit=RESTART_UNIT):
+    """Return the attempts a search may take after ``restarts`` restarts
+    with ``policy`` (``luby`` or ``geometric``) before starting over."""
+    if policy == 'luby':
+        return unit * luby(restarts + 1)
+    return int(unit * RESTART_FACTOR ** restarts)
+
+
+class DancingLinks(object):
+    """Exact cover solver using Knuth's Algorithm X with Dancing Links.
+
+    ``rows`` is a list of rows, each one a list of the columns (integers
+    in ``range(columns)``) it covers. Nodes are kept in flat lists where
+    index 0 is the root, ``1`` to ``columns`` are the column headers and
+    the remaining ones are the matrix cells.
+
+    """
+
+    def __init__(self, columns, rows, max_visits=0, deadline=None):
+        self.max_visits = max_visits
+        self.deadline = deadline
+        self.visits = 0
+        self.solutions = 0
+        self.limit = 1
+        self.next_check = next_check(0, max_visits, deadline)
+
+        headers = columns + 1
+        self.left = [i - 1 for i in range(headers)]
+        self.right = [i + 1 for i in range(headers)]
+        self.left[0] = columns
+        self.right[columns] = 0
+        self.up = list(range(headers))
+        self.down = list(range(headers))
+        self.column = list(range(headers))
+        self.row = [-1] * headers
+        self.size = [0] * headers
+
+        for row_index, row in enumerate(rows):
+            first = None
+            for column in row:
+                column += 1
+                node = len(self.column)
+                self.column.append(column)
+                self.row.append(row_index)
+                self.up.append(self.up[column])
+                self.down.append(column)
+                self.down[self.up[column]] = node
+                self.up[column] = node
+                self.size[column] += 1
+
+                if first is None:
+                    first = node
+                    self.left.append(node)
+                    self.right.append(node)
+                else:
+                    self.left.append(self.left[first])
+                    self.right.append(first)
+                    self.right[self.left[first]] = node
+                    self.left[first] = node
+
+    def cover(self, column):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        right[left[column]] = right[column]
+        left[right[column]] = left[column]
+
+        i = down[column]
+        while i != column:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                self.size[self.column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, column):
+        left, right, up, down = self.left, self.right, self.up, self.down
+
+        i = up[column]
+        while i != column:
+            j = left[i]
+            while j != i:
+                self.size[self.column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+
+        right[left[column]] = column
+        left[right[column]] = column
+
+    def solve(self):
+        """Return the list of rows of the first exact cover found.
+
+        Returns ``None`` if there is no solution and raises
+        ``MaxAttemptsExceeded`` if more than ``max_visits`` rows are
+        tried or ``TimeLimitExceeded`` if ``time.time()`` gets past
+        ``deadline``.
+
+        """
+        self.limit = 1
+        solution = []
+        if self._search(solution):
+            return [self.row[node] for node in solution]
+
+    def count(self, limit=0):
+        """Return the number of exact covers, up to ``limit`` if greater
+        than zero. Limits are handled as in ``solve``."""
+        self.limit = limit
+        self.solutions = 0
+        self._search([])
+        return self.solutions
+
+    def _search(self, solution):
+        right, down, size = self.right, self.down, self.size
+
+        if right[0] == 0:
+            self.solutions += 1
+            return self.solutions == self.limit
+
+        # Choose the column with fewer rows
+        column = right[0]
+        j = right[column]
+        while j != 0:
+            if size[j] < size[column]:
+                column = j
+            j = right[j]
+
+        self.cover(column)
+
+        node = down[column]
+        while node != column:
+            self.visits += 1
+            if self.visits >= self.next_check:
+                self.check_limits()
+
+            solution.append(node)
+            j = right[node]
+            while j != node:
+                self.cover(self.column[j])
+                j = right[j]
+
+            if self._search(solution):
+                return True
+
+            solution.pop()
+            j = self.left[node]
+            while j != node:
+                self.uncover(self.column[j])
+                j = self.left[j]
+
+            node = down[node]
+
+        self.uncover(column)
+        return False
+
+    def check_limits(self):
+        if self.max_visits > 0 and self.visits > self.max_visits:
+            raise MaxAttemptsExceeded
+        if self.deadline is not None and time.time() > self.deadline:
+            raise TimeLimitExceeded
+        self.next_check = next_check(self.visits, self.max_visits,
+                                     self.deadline)
+
+
+class MoveQueue(object):
+    """Empty positions still to be visited, in line by line order.
+
+    Positions are kept as a list of negated indices sorted in increasing
+    order, so the next position is popped from the end of the list.
+
+    """
+
+    def __init__(self, positions):
+        self.positions = positions
+        self._indices = []
+
+    def append(self, position):
+        self.push(position)
+
+    def push(self, position):
+        bisect.insort(self._indices, -position.index)
+
+    def pop(self):
+        return self.positions[-self._indices.pop()]
+
+    def remove(self, position):
+        self._indices.remove(-position.index)
+
+    def touch(self, index):
+        pass
+
+    def touch_peers(self, index):
+        pass
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __iter__(self):
+        for index in reversed(self._indices):
+            yield self.positions[-index]
+
+    def __str__(self):
+        return str(list(self))
+
+    def __repr__(self):
+        return str(self)
+
+
+class MRVQueue(MoveQueue):
+    """Empty positions still to be visited, fewer possibilities first.
+
+    Positions are kept in buckets indexed by their number of
+    possibilities, each one a linked list. Ties are broken exactly like
+    a stable sort of the previous order would: positions ``push``-ed
+    back come first, then positions that gained possibilities, the ones
+    that kept them and the ones that lost possibilities. To tell the
+    order of two positions of a bucket each one has a label, decreasing
+    when added to the head and increasing when added to the tail.
+
+    Positions whose possibilities may have changed are flagged with
+    ``touch`` and only moved between buckets when ``pop`` is called.
+
+    """
+
+    def __init__(self, positions, board=BOARD):
+        self.positions = positions
+        self.peers = board.peers
+        self.bit_count = board.bit_count
+        self.buckets = board.size + 1
+        size = len(positions)
+        self.queued = [False] * size
+        self.bucket = [None] * size
+        self.label = [0] * size
+        self.previous = [-1] * size
+        self.next = [-1] * size
+        self.head = [-1] * self.buckets
+        self.tail = [-1] * self.buckets
+        self.first_label = 0
+        self.last_label = 0
+        self.count = 0
+        self.dirty = []
+        self.is_dirty = [False] * size
+        self.pushed = []
+        self.unsorted = []
+
+    def append(self, position):
+        self.queued[position.index] = True
+        self.count += 1
+        self.unsorted.append(position.index)
+
+    def push(self, position):
+        self.queued[position.index] = True
+        self.count += 1
+        self.pushed.append(position.index)
+
+    def remove(self, position):
+        index = position.index
+        self.queued[index] = False
+        self.count -= 1
+        if self.bucket[index] is not None:
+            self._unlink(index)
+
+    def touch(self, index):
+        if self.bucket[index] is not None and not self.is_dirty[index]:
+            self.is_dirty[index] = True
+            self.dirty.append(index)
+
+    def touch_peers(self, index):
+        self.touch(index)
+        for peer in self.peers[index]:
+            self.touch(peer)
+
+    def pop(self):
+        self._sort()
+
+        head = self.head
+        for bucket in range(self.buckets):
+            index = head[bucket]
+            if index != -1:
+                self._unlink(index)
+                self.queued[index] = False
+                self.count -= 1
+                return self.positions[index]
+
+        raise IndexError('pop from empty queue')
+
+    def _length(self, index):
+        return self.bit_count[self.positions[index].possibilities.mask]
+
+    def _link_head(self, index, bucket):
+        self.first_label -= 1
+        self.label[index] = self.first_label
+        self.bucket[index] = bucket
+        self.previous[index] = -1
+        self.next[index] = self.head[bucket]
+        if self.head[bucket] == -1:
+            self.tail[bucket] = index
+        else:
+            self.previous[self.head[bucket]] = index
+        self.head[bucket] = index
+
+    def _link_tail(self, index, bucket):
+        self.last_label += 1
+        self.label[index] = self.last_label
+        self.bucket[index] = bucket
+        self.next[index] = -1
+        self.previous[index] = self.tail[bucket]
+        if self.tail[bucket] == -1:
+            self.head[bucket] = index
+        else:
+            self.next[self.tail[bucket]] = index
+        self.tail[bucket] = index
+
+    def _unlink(self, index):
+        bucket = self.bucket[index]
+        previous = self.previous[index]
+        next_index = self.next[index]
+
+        if previous == -1:
+            self.head[bucket] = next_index
+        else:
+            self.next[previous] = next_index
+
+        if next_index == -1:
+            self.tail[bucket] = previous
+        else:
+            self.previous[next_index] = previous
+
+        self.bucket[index] = None
+
+    def _sort(self):
+        for index in self.unsorted:
+            if self.queued[index] and self.bucket[index] is None:
+                self._link_tail(index, self._length(index))
+        self.unsorted = []
+
+        moved = []
+        for index in self.dirty:
+            self.is_dirty[index] = False
+            bucket = self.bucket[index]
+            if bucket is None:
+                continue
+
+            length = self._length(index)
+            if length != bucket:
+                moved.append((bucket, self.label[index], index, length))
+                self._unlink(index)
+        self.dirty = []
+
+        moved.sort()
+        for bucket, label, index, length in reversed(moved):
+            if bucket < length:
+                self._link_head(index, length)
+        for bucket, label, index, length in moved:
+            if bucket > length:
+                self._link_tail(index, length)
+
+        last_push = {}
+        for k, index in enumerate(self.pushed):
+            last_push[index] = k
+        for k, index in enumerate(self.pushed):
+            if (last_push[index] == k and self.queued[index] and
+                    self.bucket[index] is None):
+                self._link_head(index, self._length(index))
+        self.pushed = []
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        self._sort()
+        for bucket in range(self.buckets):
+            index = self.head[bucket]
+            while index != -1:
+                yield self.positions[index]
+                index = self.next[index]
+
+
+class Tracer(object):
+    """Receive the events of the search of a ``Game``.
+
+    Install an instance as ``Game.tracer`` (or pass it as the ``tracer``
+    argument) to follow the search. Every method is a no-op so
+    subclasses only override the events they need. When no tracer is
+    installed the search doesn't build any event at all.
+
+    """
+
+    def assign(self, position, value):
+        """``position`` is about to be set to ``value``."""
+
+    def unassign(self, position, value):
+        """``value`` is about to be removed from ``position``."""
+
+    def select(self, game, source, position):
+        """The search moved forward from ``source`` to ``position``."""
+
+    def backtrack(self, game, source, position):
+        """``source`` ran out of values and the search went back to
+        ``position``."""
+
+    def check(self, game, position, value):
+        """``value`` is about to be forward checked for ``position``."""
+
+    def prune(self, game, failed, value=0):
+        """``failed`` (a position or, during propagation, a unit) ran out
+        of possibilities while checking ``value`` (``0`` when
+        propagating)."""
+
+    def infer(self, game, position, value):
+        """Propagation set ``position`` to ``value``."""
+
+    def finish(self, game):
+        """``Game.solve`` returned or raised."""
+
+
+class DebugTracer(Tracer):
+    """Log every event with ``logging.debug``, as ``--debug`` does."""
+
+    def __init__(self):
+        # Going back more than one position logs "Backtracking!" once
+        self.backtracking = False
+
+    def assign(self, position, value):
+        self.backtracking = False
+        logging.debug('Setting position [%s][%s] from %s to %s',
+                      position.i, position.j, position.value, value)
+        logging.debug('Removed %s from possibilities', value)
+
+    def unassign(self, position, value):
+        logging.debug('Setting position [%s][%s] from %s to %s',
+                      position.i, position.j, value, 0)
+        logging.debug('Added %s back to possibilities', value)
+
+    def select(self, game, source, position):
+        self.backtracking = False
+        if game.mrv:
+            logging.debug('Sorting by min possibilities remaining')
+        logging.debug('Moving from %s to %s', source, position)
+        game.log_step(position)
+
+    def backtrack(self, game, source, position):
+        if not self.backtracking:
+            logging.debug('Backtracking!')
+            self.backtracking = True
+        logging.debug('No possibilities for [%s][%s]', *source.coordinates)
+        logging.debug('Moving from %s to %s', source, position)
+        game.log_step(position)
+
+    def check(self, game, position, value):
+        logging.debug('Forward Checking possibility %s', value)
+
+    def prune(self, game, failed, value=0):
+        if value:
+            logging.debug('Forward Checking failed on position %s', failed)
+        elif isinstance(failed, GamePosition):
+            logging.debug('Propagation failed on position %s', failed)
+        else:
+            logging.debug('Propagation failed on unit %s', failed)
+
+    def infer(self, game, position, value):
+        logging.debug('Propagation set position %s to %s', position, value)
+
+
+class CountingTracer(Tracer):
+    """Count the events of each game, logging them when it finishes."""
+
+    EVENTS = ('assign', 'unassign', 'select', 'backtrack', 'check',
+              'prune', 'infer')
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.EVENTS, 0)
+
+    def assign(self, position, value):
+        self.counts['assign'] += 1
+
+    def unassign(self, position, value):
+        self.counts['unassign'] += 1
+
+    def select(self, game, source, position):
+        self.counts['select'] += 1
+
+    def backtrack(self, game, source, position):
+        self.counts['backtrack'] += 1
+
+    def check(self, game, position, value):
+        self.counts['check'] += 1
+
+    def prune(self, game, failed, value=0):
+        self.counts['prune'] += 1
+
+    def infer(self, game, position, value):
+        self.counts['infer'] += 1
+
+    def finish(self, game):
+        logging.info('Game #%s events: %s', game.id,
+                     ', '.join('%s=%s' % (event, self.counts[event])
+                               for event in self.EVENTS))
+        self.counts = dict.fromkeys(self.EVENTS, 0)
+
+
+class GamePosition(object):
+
+    # Games have a position per cell, so they are kept without a __dict__
+    __slots__ = ('_value', 'possibilities', 'game', 'i', 'j', 'index',
+                 'region_index', 'wipeout')
+
+    def __init__(self, value, game, i, j):
+        self._value = 0
+        self.possibilities = Possibilities(game.units, i, j)
+        self.possibilities.order = game.order
+        self.game = game
+        self.i = i
+        self.j = j
+        self.index = i * game.board.size + j
+        self.region_index = game.board.units[self.index][2]
+        # Values refused by forward checking, see Game.forward_checking
+        self.wipeout = None
+        value = int(value)
+        if value:
+            self.value = value
+
+    def remove_possibilities(self, value):
+        units = self.game.units
+        mask = ~(1 << value)
+        units.line[self.i] &= mask
+        units.column[self.j] &= mask
+        units.region[self.region_index] &= mask
+        self.game.available_moves.touch_peers(self.index)
+
+    def add_possibilities(self, value):
+        units = self.game.units
+        bit = 1 << value
+        units.line[self.i] |= bit
+        units.column[self.j] |= bit
+        units.region[self.region_index] |= bit
+        self.game.available_moves.touch_peers(self.index)
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+
+        if value == self._value:
+            return
+
+        tracer = self.game.tracer
+
+        if not value:
+            if tracer is not None:
+                tracer.unassign(self, self._value)
+            self.add_possibilities(self._value)
+        else:
+            if tracer is not None:
+                tracer.assign(self, value)
+            self.remove_possibilities(value)
+            game = self.game
+            game.attempts_count += 1
+
+            # Abort if the attempts or the time exceed the limits set
+            if game.attempts_count >= game.next_check:
+                game.check_limits()
+
+        self._value = value
+
+    @property
+    def line(self):
+        positions = self.game.positions
+        peers = self.game.board.line_peers
+        return [positions[index] for index in peers[self.index]]
+
+    @property
+    def column(self):
+        positions = self.game.positions
+        peers = self.game.board.column_peers
+        return [positions[index] for index in peers[self.index]]
+
+    @property
+    def region(self):
+        positions = self.game.positions
+        peers = self.game.board.region_peers
+        return [positions[index] for index in peers[self.index]]
+
+    @property
+    def peers(self):
+        positions = self.game.positions
+        peers = self.game.board.peers
+        return [positions[index] for index in peers[self.index]]
+
+    @property
+    def coordinates(self):
+        return self.i, self.j
+
+    def __str__(self):
+        return str(self.coordinates)
+
+    def __repr__(self):
+        return str(self)
+
+
+class GameStats(object):
+    """Counters and phase timings of a ``Game``.
+
+    ``nodes`` counts the positions chosen by the search and
+    ``backtracks`` the times it went back to a previous one.
+    ``backjumps`` counts the times it went back past a previous one
+    and ``restarts`` the times it started over.
+    ``fc_rejections`` counts the values refused by forward checking.
+    ``times`` holds the seconds spent on each of ``PHASES``; the ones
+    not done by the game itself (``parse``) are filled by the caller.
+
+    """
+
+    PHASES = ('parse', 'setup', 'search', 'output')
+
+    def __init__(self):
+        self.status = None
+        self.solutions = 0
+        self.attempts = 0
+        self.nodes = 0
+        self.backtracks = 0
+        self.backjumps = 0
+        self.restarts = 0
+        self.splits = 0
+        self.fc_rejections = 0
+        self.max_depth = 0
+        self.propagated = 0
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+
+    @property
+    def latency(self):
+        return sum(self.times.values())
+
+    def to_dict(self, game_id=None):
+        return {
+            'game': game_id,
+            'status': self.status,
+            'solutions': self.solutions,
+            'attempts': self.attempts,
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'backjumps': self.backjumps,
+            'restarts': self.restarts,
+            'splits': self.splits,
+            'fc_rejections': self.fc_rejections,
+            'max_depth': self.max_depth,
+            'propagated': self.propagated,
+            'times': dict(self.times),
+            'latency': self.latency,
+        }
+
+
+class Game(object):
+
+    def __init__(self, matrix, forward_check=False, mrv=False, max_attempts=0,
+                 propagate=False, locked_candidates=False, engine='backtrack',
+                 tracer=None, time_limit=0, deadline=None, box_size=None,
+                 backjump=False, value_order='lowest', seed=None,
+                 restarts=None, restart_unit=RESTART_UNIT, cancel=None,
+                 split_jobs=1):
+        if box_size is None:
+            box_size = box_size_for(len(matrix))
+            if box_size is None:
+                raise ValueError('Invalid game with %s lines' % len(matrix))
+
+        self.board = Board.get(box_size)
+        self.value_order = value_order
+        self.seed = seed
+        self.order = VALUE_ORDERS[value_order](self, seed)
+        self.restarts = restarts
+        self.restart_unit = restart_unit
+        self.cancel = cancel
+        self.split_jobs = split_jobs
+        self.tracer = tracer
+        self.forward_check = forward_check
+        self.mrv = mrv
+        self.propagate = propagate or locked_candidates
+        self.locked_candidates = locked_candidates
+        self.backjump = backjump
+        self.max_attempts = max_attempts
+        self.time_limit = time_limit
+        self.deadline = deadline
+        self.engine = engine
+        self.units = UnitMasks(self.board)
+        self.init_search()
+
+        start = time.time()
+
+        # Start an empty game
+        self.empty_game()
+
+        # Initialize the game with input data
+        self.init_game(matrix)
+
+        self.stats.times['setup'] = time.time() - start
+
+    def init_search(self):
+        """Set the state of a search not started yet."""
+        # Levels of last_moves responsible for the failures of each one
+        # and for the value of each position, see Game.backjump_from
+        self.conflicts = []
+        self.blame = [0] * self.board.cells
+        self.inferences = {}
+        self.propagated_count = 0
+        self.last_moves = []
+        self.backtracking = False
+        self.attempts_count = 0
+        # Set by init_game if a given repeats a value on a unit
+        self.conflicting_givens = False
+        self.cutoff = None
+        self.next_check = next_check(0, self.max_attempts)
+        self.restart_at = float('inf')
+        self.restart_pending = False
+        self.id = None
+        self.stats = GameStats()
+
+    def reset(self, puzzle):
+        """Start over with ``puzzle`` (see ``from_string``), reusing the
+        positions of the game instead of building new ones.
+
+        ``puzzle`` must have the size of the game. Options are kept, so
+        the game is the same as one built by ``from_string`` with them.
+
+        """
+        board = self.board
+        if len(puzzle) != board.cells:
+            raise ValueError('Invalid game with %s values for a %sx%s '
+                             'board' % (len(puzzle), board.size, board.size))
+
+        start = time.time()
+        self.init_search()
+        self.order = VALUE_ORDERS[self.value_order](self, self.seed)
+
+        units = self.units
+        for unit_masks in (units.line, units.column, units.region):
+            unit_masks[:] = [board.all_values] * board.size
+        for position in self.positions:
+            position._value = 0
+            position.wipeout = None
+            possibilities = position.possibilities
+            possibilities.tested_mask = 0
+            possibilities.excluded_mask = 0
+            possibilities.order = self.order
+
+        self.init_game([puzzle[offset:offset + board.size]
+                        for offset in range(0, board.cells, board.size)])
+        self.stats.times['setup'] = time.time() - start
+
+    @classmethod
+    def from_string(cls, puzzle, **kwargs):
+        """Create a game from the values returned by ``to_string``.
+
+        Blank positions may be given either as ``0`` or as ``.``. The
+        box size is taken from the length of ``puzzle`` unless given.
+
+        """
+        if kwargs.get('box_size'):
+            size = kwargs['box_size'] ** 2
+        else:
+            size = int(round(len(puzzle) ** 0.5))
+        return cls([puzzle[start:start + size]
+                    for start in range(0, size * size, size)], **kwargs)
+
+    def to_string(self):
+        return ''.join(VALUE_CHARS[position.value]
+                       for position in self.positions)
+
+    def init_game(self, matrix):
+        if self.mrv:
+            self.available_moves = MRVQueue(self.positions, self.board)
+        else:
+            self.available_moves = MoveQueue(self.positions)
+
+        size = self.board.size
+        units = self.units
+        region_indices = self.board.units
+        givens = 0
+        for i, line in enumerate(matrix):
+            for j, value in enumerate(line):
+                position = self.matrix[i][j]
+                value = parse_value(value)
+                if value > size:
+                    raise ValueError('Invalid value %s at [%s][%s]' %
+                                     (value, i, j))
+                if not value:
+                    self.available_moves.append(position)
+                    continue
+
+                region = region_indices[i * size + j][2]
+                if not (units.line[i] & units.column[j] &
+                        units.region[region] & 1 << value):
+                    self.conflicting_givens = True
+
+                if self.tracer is not None:
+                    position.value = value
+                else:
+                    # Like the value setter, without touching the peers
+                    # of the position: empty positions are only sorted
+                    # on the first pop of the queue
+                    position._value = value
+                    mask = ~(1 << value)
+                    units.line[i] &= mask
+                    units.column[j] &= mask
+                    units.region[region] &= mask
+                    givens += 1
+
+        # Givens are counted as attempts, like any value set
+        self.attempts_count += givens
+        if self.attempts_count >= self.next_check:
+            self.check_limits()
+
+    def empty_game(self):
+        size = self.board.size
+        self.positions = [GamePosition(0, self, i, j)
+                          for i in range(size) for j in range(size)]
+        self.matrix = [self.positions[start:start + size]
+                       for start in range(0, size * size, size)]
+
+    def log_step(self, position=None):
+        if position:
+            logging.debug('Current position: %s', position.coordinates)
+        else:
+            logging.debug('Current position: n/a')
+
+        logging.debug('Current status:\n%s', self)
+
+        logging.debug('Available moves (%s): %s',
+                      len(self.available_moves),
+                      self.available_moves)
+
+        logging.debug('Last moves: %s', self.last_moves)
+
+        if position:
+            logging.debug('Possibilities: %s', position.possibilities)
+
+    def abort(self):
+        logging.info('Number of attempts %s', self.attempts_count)
+        self.stats.status = 'aborted'
+        raise MaxAttemptsExceeded
+
+    def timeout(self):
+        logging.info('Game #%s exceeded the time limit with %s attempts',
+                     self.id, self.attempts_count)
+        self.stats.status = 'timeout'
+        raise TimeLimitExceeded
+
+    def cancelled(self):
+        logging.info('Game #%s was cancelled with %s attempts', self.id,
+                     self.attempts_count)
+        self.stats.status = 'cancelled'
+        raise SearchCancelled
+
+    def check_limits(self):
+        if self.max_attempts > 0 and self.attempts_count > self.max_attempts:
+            self.abort()
+        if self.cutoff is not None and time.time() > self.cutoff:
+            self.timeout()
+        if self.cancel is not None and self.cancel.is_set():
+            self.cancelled()
+        if self.attempts_count >= self.restart_at:
+            self.restart_pending = True
+            self.restart_at = float('inf')
+
+        checks = [next_check(self.attempts_count, self.max_attempts,
+                             self.cutoff), self.restart_at]
+        if self.cancel is not None:
+            checks.append(self.attempts_count + TIME_CHECK_INTERVAL)
+        self.next_check = min(checks)
+
+    def schedule_restart(self):
+        """Start the search over after the attempts allowed by the
+        ``restarts`` policy, if set."""
+        if self.restarts is None:
+            return
+
+        self.restart_at = self.attempts_count + restart_cutoff(
+            self.restarts, self.stats.restarts, self.restart_unit)
+        self.next_check = min(self.next_check, self.restart_at)
+
+    def restart(self):
+        """Undo every move so the search starts over."""
+        self.restart_pending = False
+        self.backtracking = False
+
+        while self.last_moves:
+            position = self.last_moves.pop()
+            self.undo_propagation(position)
+            position.value = 0
+            position.possibilities.tested_mask = 0
+            self.available_moves.push(position)
+        del self.conflicts[:]
+
+        self.stats.restarts += 1
+        logging.debug('Restarting after %s attempts', self.attempts_count)
+        self.schedule_restart()
+
+    def solve(self):
+        """Search a solution for the game.
+
+        Raises ``MaxAttemptsExceeded`` after ``max_attempts`` attempts
+        and ``TimeLimitExceeded`` after ``time_limit`` seconds or once
+        ``time.time()`` gets past ``deadline``, if they are set, or
+        ``SearchCancelled`` once ``cancel`` (an object like
+        ``threading.Event``) is set. With ``split_jobs`` greater than
+        one, the backtrack engine searches on that many processes, see
+        ``solve_split``.
+
+        """
+        if self.engine == 'dlx':
+            return self._run(self.solve_dlx)
+        if self.split_jobs > 1:
+            return self._run(self.solve_split, self.split_jobs)
+        return self._run(self.solve_backtrack)
+
+    def solve_steps(self, slice_size=SLICE_SIZE):
+        """Search a solution like ``solve``, about ``slice_size`` attempts
+        at a time.
+
+        This is a generator yielding after each slice until the game is
+        solved or found to have no solution, so the search of many games
+        can be interleaved. Limits are handled as in ``solve``, with the
+        time limit counting only the time spent searching. Games of the
+        dlx engine are searched in a single slice.
+
+        """
+        if self.engine == 'dlx':
+            self.solve()
+            return
+
+        steps = self.search(slice_size)
+        while not self._run(self.solve_backtrack, steps):
+            yield
+
+    def count_solutions(self, limit=2):
+        """Return the number of solutions of the game.
+
+        The search stops once ``limit`` solutions are found (unless it is
+        ``0``), so the default tells whether the solution is unique.
+        Limits are handled as in ``solve``. With the backtrack engine
+        the game is left with the last solution found if the search
+        stopped at ``limit``, otherwise with the puzzle as given. Games
+        whose givens repeat a value on a unit have no solution.
+
+        """
+        if self.engine == 'dlx':
+            return self._run(self.count_dlx, limit)
+        return self._run(self.count_backtrack, limit)
+
+    def iter_solutions(self):
+        """Yield the solutions of the game, as strings like the ones of
+        ``to_string``, as the search finds them.
+
+        After each one the search goes on from the last move, so taking
+        the first solutions costs only the attempts needed to find
+        them. The game holds the last solution yielded. Limits are
+        handled as in ``solve``. The backtrack search is used whatever
+        the engine.
+
+        """
+        steps = self.search()
+        self.stats.status = 'unsolved'
+
+        while self._run(next, steps, False):
+            self.stats.status = 'solved'
+            self.stats.solutions += 1
+            yield self.to_string()
+
+        logging.info('Game #%s has %s solutions (%s attempts)', self.id,
+                     self.stats.solutions, self.attempts_count)
+
+    def _run(self, search, *args):
+        """Call ``search`` enforcing the limits and timing it.
+
+        The search time is added to the one of previous calls, see
+        ``solve_steps``.
+
+        """
+        start = time.time()
+        searched = self.stats.times['search']
+        try:
+            cutoffs = [cutoff for cutoff in (
+                start + self.time_limit - searched
+                if self.time_limit > 0 else None,
+                self.deadline) if cutoff is not None]
+            if cutoffs:
+                self.cutoff = min(cutoffs)
+            if cutoffs or self.cancel is not None:
+                self.check_limits()
+
+            return search(*args)
+        finally:
+            stats = self.stats
+            stats.times['search'] = searched + time.time() - start
+            stats.attempts = self.attempts_count
+            stats.propagated = self.propagated_count
+
+            if self.tracer is not None:
+                self.tracer.finish(self)
+
+    def search(self, slice_size=0):
+        """Fill the game, yielding ``True`` each time it is solved.
+
+        After each solution the search goes on from the last position
+        filled, so the generator yields every solution of the game. With
+        a ``slice_size`` it also yields ``False`` once that many attempts
+        were made since the last pause, see ``solve_steps``.
+
+        """
+        if self.conflicting_givens or not self.constraint_propagation():
+            return
+
+        backjump = self.backjump
+        backtrack = self.backjump_from if backjump else self.backtrack
+        self.schedule_restart()
+        pause_at = (self.attempts_count + slice_size if slice_size else
+                    float('inf'))
+
+        while True:
+            for position in self:
+                for value in position.possibilities:
+                    if self.forward_checking(position, value):
+                        position.value = value
+                        if self.constraint_propagation(position):
+                            break
+                        position.value = 0
+                        if backjump:
+                            # Propagation may depend on any move
+                            self.conflicts[-1] |= (
+                                1 << len(self.last_moves)) - 1
+                    elif backjump:
+                        self.conflicts[-1] |= self._wipeout_conflict(
+                            position, value)
+                else:
+                    try:
+                        backtrack(position)
+                    except StopIteration:
+                        # Every value of the first position was tried
+                        return
+
+                if self.attempts_count >= pause_at:
+                    yield False
+                    pause_at = self.attempts_count + slice_size
+
+            # Restarting would find the same solutions again
+            self.restart_at = float('inf')
+            self.restart_pending = False
+
+            yield True
+
+            position = self.current_position
+            if position is None:
+                return
+
+            if backjump:
+                # Other solutions may depend on any move
+                self.conflicts[-1] |= (1 << len(self.last_moves)) - 1
+
+            # Try the next value of the last position
+            self.undo_propagation(position)
+            position.value = 0
+            self.backtracking = True
+
+    def solve_backtrack(self, steps=None):
+        """Search the first solution with ``steps``, a ``search``
+        generator, or a new one.
+
+        Returns ``False`` if ``steps`` paused before finding it, so a
+        later call resumes the search, and ``True`` otherwise.
+
+        """
+        start = time.time()
+        if steps is None:
+            steps = self.search()
+
+        for solved in steps:
+            if not solved:
+                return False
+            break
+        else:
+            logging.info('Game #%s has no solution', self.id)
+            self.stats.status = 'unsolved'
+            return True
+
+        elapsed = self.stats.times['search'] + time.time() - start
+        self.stats.status = 'solved'
+        self.stats.solutions = 1
+        logging.info('Game #%s solved with %s attempts in %.2f seconds',
+                     self.id, self.attempts_count, elapsed)
+
+        if self.propagate:
+            logging.info('Game #%s had %s positions filled by propagation',
+                         self.id, self.propagated_count)
+        return True
+
+    def count_backtrack(self, limit=2):
+        count = 0
+        for solution in self.search():
+            count += 1
+            if count == limit:
+                break
+
+        self.stats.status = 'solved' if count else 'unsolved'
+        self.stats.solutions = count
+        logging.info('Game #%s has %s solutions (%s attempts)', self.id,
+                     count, self.attempts_count)
+        return count
+
+    def count_dlx(self, limit=2):
+        count = 0
+        if not self.conflicting_givens:
+            links, candidates = self._exact_cover()
+            count = self._dlx(links, links.count, limit)
+
+        self.stats.status = 'solved' if count else 'unsolved'
+        self.stats.solutions = count
+        logging.info('Game #%s has %s solutions (%s attempts)', self.id,
+                     count, self.attempts_count)
+        return count
+
+    def _exact_cover(self):
+        """Return the game as an exact cover problem for ``DancingLinks``.
+
+        Each empty position and each value missing from a line, column
+        or region is a column of the matrix, and each possibility left
+        for an empty position is a row covering four of them. Returns the
+        ``DancingLinks`` and the position and value of each row.
+
+        """
+        columns = {}
+        rows = []
+        candidates = []
+
+        units = self.board.units
+        for position in list(self.available_moves):
+            i, j, k = units[position.index]
+            for value in position.possibilities.available:
+                row = []
+                for key in (position.index, (0, i, value), (1, j, value),
+                            (2, k, value)):
+                    row.append(columns.setdefault(key, len(columns)))
+                rows.append(row)
+                candidates.append((position, value))
+
+        # Positions and values no row covers still need a column, so the
+        # search finds there's no solution
+        for position in self.available_moves:
+            columns.setdefault(position.index, len(columns))
+        for kind, masks in enumerate((self.units.line, self.units.column,
+                                      self.units.region)):
+            for unit, mask in enumerate(masks):
+                for value in mask_to_set(mask):
+                    columns.setdefault((kind, unit, value), len(columns))
+
+        if self.max_attempts > 0:
+            max_visits = max(self.max_attempts - self.attempts_count, 0)
+        else:
+            max_visits = 0
+
+        links = DancingLinks(len(columns), rows, max_visits, self.cutoff)
+        return links, candidates
+
+    def _dlx(self, links, search, *args):
+        """Call ``search``, a method of ``links``, counting the rows it
+        tries as attempts."""
+        try:
+            result = search(*args)
+        except MaxAttemptsExceeded:
+            self.attempts_count += links.visits
+            self.abort()
+        except TimeLimitExceeded:
+            self.attempts_count += links.visits
+            self.timeout()
+        self.attempts_count += links.visits
+        self.stats.nodes = links.visits
+        return result
+
+    def solve_dlx(self):
+        """Solve the game as an exact cover problem with ``DancingLinks``.
+
+        Every row tried by the search counts as an attempt.
+
+        """
+        start = time.time()
+
+        solution = None
+        if not self.conflicting_givens:
+            links, candidates = self._exact_cover()
+            solution = self._dlx(links, links.solve)
+
+        if solution is None or len(solution) != len(self.available_moves):
+            logging.info('Game #%s has no solution', self.id)
+            self.stats.status = 'unsolved'
+            return
+
+        self.stats.max_depth = len(solution)
+        self.stats.status = 'solved'
+        self.stats.solutions = 1
+
+        for row in solution:
+            position, value = candidates[row]
+            self.available_moves.remove(position)
+            position.remove_possibilities(value)
+            position._value = value
+
+        elapsed = time.time() - start
+        logging.info('Game #%s solved with %s attempts in %.2f seconds',
+                     self.id, self.attempts_count, elapsed)
+
+    def split_options(self):
+        """Return the keyword arguments of the games searching branches
+        of this one, see ``solve_split``."""
+        return {
+            'forward_check': self.forward_check,
+            'mrv': self.mrv,
+            'propagate': self.propagate,
+            'locked_candidates': self.locked_candidates,
+            'backjump': self.backjump,
+            'value_order': self.value_order,
+            'seed': self.seed,
+            'restarts': self.restarts,
+            'restart_unit': self.restart_unit,
+            'box_size': self.board.box_size,
+            'deadline': self.cutoff,
+        }
+
+    def solve_split(self, jobs):
+        """Search the game on ``jobs`` processes.
+
+        The top of the search tree is split into branches, partial grids
+        with a value set on the positions with fewest possibilities (see
+        ``split_puzzle``), about ``SPLIT_FACTOR`` per process. Branches
+        still unsolved after ``SPLIT_BUDGET`` attempts are split again
+        and their branches searched first. Once a branch is solved the
+        other searches are cancelled. Attempts of every branch are
+        counted.
+
+        """
+        start = time.time()
+        options = self.split_options()
+
+        branches = collections.deque([self.to_string()])
+        while branches and len(branches) < jobs * SPLIT_FACTOR:
+            puzzle = branches.popleft()
+            split = split_puzzle(puzzle, options)
+            if split is None:
+                branches.appendleft(puzzle)
+                break
+            branches.extend(split)
+
+        cancel = multiprocessing.Event()
+        pool = multiprocessing.Pool(jobs, _init_portfolio, (cancel,))
+        results = queue.Queue()
+        pending = 0
+        solution = None
+
+        try:
+            while solution is None and (branches or pending):
+                while branches and pending < jobs:
+                    pool.apply_async(
+                        solve_branch, ((branches.popleft(), options),),
+                        callback=results.put, error_callback=results.put)
+                    pending += 1
+
+                result = results.get()
+                pending -= 1
+                if isinstance(result, BaseException):
+                    raise result
+
+                status, branch, attempts = result
+                self.attempts_count += attempts
+                if status == 'solved':
+                    solution = branch
+                elif status == 'split':
+                    self.stats.splits += 1
+                    branches.extendleft(reversed(branch))
+                elif status == 'timeout':
+                    self.timeout()
+
+                if (self.max_attempts > 0 and
+                        self.attempts_count > self.max_attempts):
+                    self.abort()
+        finally:
+            cancel.set()
+            pool.terminate()
+            pool.join()
+
+        if solution is None:
+            logging.info('Game #%s has no solution', self.id)
+            self.stats.status = 'unsolved'
+            return
+
+        self.stats.status = 'solved'
+        self.stats.solutions = 1
+
+        for position, char in zip(self.positions, solution):
+            if not position.value:
+                value = CHAR_VALUES[char]
+                self.available_moves.remove(position)
+                position.remove_possibilities(value)
+                position._value = value
+
+        elapsed = time.time() - start
+        logging.info('Game #%s solved with %s attempts on %s processes in '
+                     '%.2f seconds', self.id, self.attempts_count, jobs,
+                     elapsed)
+
+    def forward_checking(self, target_position, value):
+        """Check ``value`` doesn't leave a peer of ``target_position``
+        without possibilities.
+
+        That happens when the peer has no possibilities or only
+        ``value`` left, so the values failing for ``target_position``
+        are collected at once in its ``wipeout`` mask. Since the search
+        undoes everything done after a position when it comes back to
+        it, the mask holds while the position stays on ``last_moves``
+        and is only computed again once ``next`` chooses it again.
+
+        """
+        if not self.forward_check:
+            return True
+
+        tracer = self.tracer
+        if tracer is not None:
+            tracer.check(self, target_position, value)
+
+        wipeout = target_position.wipeout
+        if wipeout is None:
+            wipeout = target_position.wipeout = self._wipeout(target_position)
+
+        if wipeout & (1 << value):
+            self.stats.fc_rejections += 1
+            if tracer is not None:
+                mask = ~(1 << value)
+                for position in target_position.peers:
+                    if (not position._value and
+                            not position.possibilities.mask & mask):
+                        tracer.prune(self, position, value)
+                        break
+            return False
+
+        return True
+
+    def _wipeout(self, target_position):
+        """Return the mask of the values forward checking refuses for
+        ``target_position``."""
+        positions = self.positions
+        board = self.board
+        position_units = board.units
+        units = self.units
+        line, column, region = units.line, units.column, units.region
+        wipeout = 0
+
+        for index in board.peers[target_position.index]:
+            position = positions[index]
+            if position._value:
+                continue
+
+            # Same as position.possibilities.mask, inlined
+            possibilities = position.possibilities
+            i, j, k = position_units[index]
+            mask = (line[i] & column[j] & region[k] &
+                    ~(possibilities.tested_mask |
+                      possibilities.excluded_mask))
+            if not mask:
+                return board.all_values
+            if not mask & (mask - 1):
+                wipeout |= mask
+
+        return wipeout
+
+    def _culprits(self, index, values):
+        """Return the levels of ``last_moves`` responsible for ``values``
+        (a mask) being taken from the position at ``index``.
+
+        Each value is blamed on the peer holding it set earliest.
+        Givens aren't blamed at all, nor the values inferred before the
+        first move, but values inferred after a move are blamed on it
+        and on every previous move, and so are the values excluded by
+        locked candidates.
+
+        """
+        positions = self.positions
+        blame = self.blame
+        culprits = {}
+
+        for peer in self.board.peers[index]:
+            value = positions[peer]._value
+            if value and values & (1 << value):
+                if blame[peer] < culprits.get(value, blame[peer] + 1):
+                    culprits[value] = blame[peer]
+
+        conflict = 0
+        for levels in culprits.values():
+            conflict |= levels
+
+        if positions[index].possibilities.excluded_mask & values:
+            conflict |= (1 << len(self.last_moves)) - 1
+
+        return conflict
+
+    def _wipeout_conflict(self, target_position, value):
+        """Return the levels responsible for forward checking refusing
+        ``value`` for ``target_position``."""
+        board = self.board
+        positions = self.positions
+        others = board.all_values & ~(1 << value)
+
+        for index in board.peers[target_position.index]:
+            position = positions[index]
+            if position._value:
+                continue
+
+            mask = position.possibilities.mask
+            if not mask & others:
+                return self._culprits(index, others & ~mask)
+
+        return (1 << len(self.last_moves)) - 1
+
+    def backjump_from(self, position):
+        """Conflict-directed backjumping, used instead of ``backtrack``
+        if ``backjump`` is set.
+
+        Each level of ``last_moves`` has a conflict set in
+        ``conflicts``: the previous levels responsible for the values
+        of its position failing or not being available. Once a position
+        runs out of values the search goes back to the deepest level of
+        its conflict set, undoing every level in between, as none of
+        them could make a difference. The rest of the conflict set is
+        added to the one of that level.
+
+        """
+        board = self.board
+        units = self.units
+
+        while not position.possibilities:
+            level = len(self.last_moves) - 1
+            i, j, k = board.units[position.index]
+            taken = board.all_values & ~(units.line[i] & units.column[j] &
+                                         units.region[k])
+            conflict = ((self.conflicts[level] |
+                         self._culprits(position.index, taken)) &
+                        ((1 << level) - 1))
+
+            # Failing regardless of the moves, the game has no solution
+            if not conflict:
+                raise StopIteration
+
+            target = conflict.bit_length() - 1
+            if target < level - 1:
+                self.stats.backjumps += 1
+
+            while len(self.last_moves) - 1 > target:
+                position.possibilities.tested_mask = 0
+                position = self.previous()
+                self.undo_propagation(position)
+                position.value = 0
+
+            self.conflicts[target] |= conflict & ~(1 << target)
+
+        self.backtracking = True
+
+    def constraint_propagation(self, target_position=None):
+        """Fill every position that has a single possible value left.
+
+        Applies naked singles, hidden singles and, if enabled, locked
+        candidates until nothing changes. The inferences are stored so
+        ``undo_propagation`` can revert them when ``target_position``
+        is backtracked. Returns ``False`` (with the inferences already
+        reverted) if a position or a unit runs out of possibilities.
+
+        """
+        if not self.propagate:
+            return True
+
+        changes = []
+        if not self._propagate(changes):
+            self._revert(changes)
+            return False
+
+        if target_position is not None:
+            self.inferences[target_position.index] = changes
+
+        return True
+
+    def _propagate(self, changes):
+        positions = self.positions
+        units = self.units
+        board = self.board
+        bit_count = board.bit_count
+        lowest_value = board.lowest_value
+
+        progress = True
+        while progress:
+            progress = False
+
+            # Naked singles
+            for position in positions:
+                if position._value:
+                    continue
+
+                mask = position.possibilities.mask
+                if not mask:
+                    if self.tracer is not None:
+                        self.tracer.prune(self, position)
+                    return False
+
+                if bit_count[mask] == 1:
+                    self._infer(position, lowest_value[mask], changes)
+                    progress = True
+
+            # Hidden singles
+            for unit_masks, unit_positions in ((units.line, board.lines),
+                                               (units.column, board.columns),
+                                               (units.region, board.regions)):
+                for unit_mask, unit in zip(unit_masks, unit_positions):
+                    once = twice = 0
+                    for index in unit:
+                        position = positions[index]
+                        if not position._value:
+                            mask = position.possibilities.mask
+                            twice |= once & mask
+                            once |= mask
+
+                    if unit_mask & ~once:
+                        if self.tracer is not None:
+                            self.tracer.prune(self, unit)
+                        return False
+
+                    singles = once & ~twice
+                    if not singles:
+                        continue
+
+                    value = lowest_value[singles]
+                    for index in unit:
+                        position = positions[index]
+                        if (not position._value and
+                                position.possibilities.mask & (1 << value)):
+                            self._infer(position, value, changes)
+                            progress = True
+                            break
+
+            if not progress and self.locked_candidates:
+                progress = self._locked_candidates(changes)
+
+        return True
+
+    def _locked_candidates(self, changes):
+        positions = self.positions
+        progress = False
+
+        for common, region_rest, unit_rest in self.board.intersections:
+            masks = []
+            for indices in (common, region_rest, unit_rest):
+                mask = 0
+                for index in indices:
+                    position = positions[index]
+                    if not position._value:
+                        mask |= position.possibilities.mask
+                masks.append(mask)
+
+            common_mask, region_mask, unit_mask = masks
+
+            # Values of the region only available on the line/column can
+            # be removed from the rest of the line/column and vice versa
+            for indices, mask in (
+                    (unit_rest, common_mask & ~region_mask & unit_mask),
+                    (region_rest, common_mask & ~unit_mask & region_mask)):
+                if not mask:
+                    continue
+
+                for index in indices:
+                    position = positions[index]
+                    possibilities = position.possibilities
+                    excluded = mask & possibilities.mask
+                    if position._value or not excluded:
+                        continue
+
+                    possibilities.excluded_mask |= excluded
+                    self.available_moves.touch(index)
+                    changes.append((position, 0, excluded))
+                    progress = True
+
+        return progress
+
+    def _infer(self, position, value, changes):
+        if self.tracer is not None:
+            self.tracer.infer(self, position, value)
+        if self.backjump:
+            self.blame[position.index] = (1 << len(self.last_moves)) - 1
+        position.value = value
+        self.available_moves.remove(position)
+        self.propagated_count += 1
+        changes.append((position, value, 0))
+
+    def _revert(self, changes):
+        for position, value, excluded in reversed(changes):
+            if value:
+                position.value = 0
+                self.available_moves.push(position)
+            else:
+                position.possibilities.excluded_mask &= ~excluded
+                self.available_moves.touch(position.index)
+
+    def undo_propagation(self, position):
+        changes = self.inferences.pop(position.index, None)
+        if changes:
+            self._revert(changes)
+
+    def backtrack(self, position):
+        while not position.possibilities:
+            position.possibilities.tested_mask = 0
+            position = self.previous()
+            self.undo_propagation(position)
+            position.value = 0
+
+        self.backtracking = True
+
+    def next(self):
+        if self.restart_pending and self.available_moves:
+            self.restart()
+
+        if self.backtracking:
+            self.backtracking = False
+            return self.current_position
+
+        if not self.available_moves:
+            raise StopIteration
+
+        position = self.available_moves.pop()
+        position.wipeout = None
+
+        self.last_moves.append(position)
+        if self.backjump:
+            self.blame[position.index] = 1 << (len(self.last_moves) - 1)
+            self.conflicts.append(0)
+
+        stats = self.stats
+        stats.nodes += 1
+        if len(self.last_moves) > stats.max_depth:
+            stats.max_depth = len(self.last_moves)
+
+        if self.tracer is not None:
+            source = self.last_moves[-2] if len(self.last_moves) > 1 else None
+            self.tracer.select(self, source, position)
+
+        return position
+
+    def __next__(self):
+        return self.next()
+
+    def previous(self):
+        if len(self.last_moves) == 1:
+            raise StopIteration
+
+        last_position = self.last_moves.pop()
+        self.available_moves.push(last_position)
+        if self.backjump:
+            self.conflicts.pop()
+        self.stats.backtracks += 1
+
+        if self.tracer is not None:
+            self.tracer.backtrack(self, last_position, self.current_position)
+
+        return self.current_position
+
+    @property
+    def current_position(self):
+        try:
+            position = self.last_moves[-1]
+        except IndexError:
+            return
+
+        return position
+
+    def __str__(self):
+        game_repr = []
+        for line in self.matrix:
+            for position in line:
+                game_repr.append(VALUE_CHARS[position.value])
+                game_repr.append(' ')
+            game_repr[-1] = '\n'
+        return ''.join(game_repr)
+
+    def __repr__(self):
+        return str(self)
+
+    def __iter__(self):
+        return self
+
+    def is_valid(self):
+        """Return whether the game holds a valid solution, see
+        ``check_solution``."""
+        reason = check_solution(self.to_string())
+        if reason is not None:
+            logging.info('Game #%s: invalid solution (%s)', self.id, reason)
+            logging.debug('\n%s', self)
+            return False
+
+        return True
+
+
+def check_solution(puzzle):
+    """Return why ``puzzle`` (see ``Game.to_string``) isn't a valid
+    solution, or ``None`` if it is.
+
+    Values are checked as bitmasks of each unit, without building a
+    ``Game``, so this is much cheaper than ``Game.is_valid`` when the
+    grids are already strings.
+
+    """
+    box_size = puzzle_box_size(len(puzzle))
+    if box_size is None:
+        return 'invalid length %s' % len(puzzle)
+
+    board = Board.get(box_size)
+    size = board.size
+    bits = []
+    for index, char in enumerate(puzzle):
+        value = CHAR_VALUES.get(char, size + 1)
+        if not 0 < value <= size:
+            return '%s at %s' % ('empty position' if value == 0 else
+                                 'invalid value %r' % char,
+                                 divmod(index, size))
+        bits.append(1 << value)
+
+    for kind, units in (('line', board.lines), ('column', board.columns),
+                        ('region', board.regions)):
+        for number, unit in enumerate(units):
+            mask = 0
+            for index in unit:
+                mask |= bits[index]
+            if mask != board.all_values:
+                missing = board.lowest_value[board.all_values & ~mask]
+                return 'repeated value on %s %s, missing %s' % (
+                    kind, number, VALUE_CHARS[missing])
+
+    return None
+
+
+def check_solution_batch(puzzles):
+    """Return whether each of ``puzzles``, all of the same size, is a
+    valid solution, checking them at once with NumPy.
+
+    The value bits of every grid are kept in a ``(N, cells)`` array and
+    OR-reduced over the unit index tables, like ``propagate_batch``.
+
+    """
+    if numpy is None:
+        raise RuntimeError('Checking batches requires NumPy')
+
+    box_size = puzzle_box_size(len(puzzles[0]))
+    if box_size is None:
+        return [False] * len(puzzles)
+    board = Board.get(box_size)
+
+    # Bits of every byte, with blanks and invalid characters on the
+    # unused bit 0, so their units never match
+    char_bits = numpy.ones(256, dtype=numpy.uint32)
+    for char, value in CHAR_VALUES.items():
+        if 0 < value <= board.size:
+            char_bits[ord(char)] = 1 << value
+
+    data = ''.join(puzzles).encode('ascii', 'replace')
+    if len(data) != board.cells * len(puzzles):
+        raise ValueError('Puzzles of a batch must have the same size')
+    bits = char_bits[numpy.frombuffer(data, dtype=numpy.uint8)]
+    bits = bits.reshape(-1, board.cells)
+
+    units = numpy.array(board.lines + board.columns + board.regions)
+    placed = numpy.bitwise_or.reduce(bits[:, units], axis=2)
+    return (placed == board.all_values).all(axis=1).tolist()
+
+
+def validate_puzzles(puzzles, batch_size=NUMPY_BATCHSIZE):
+    """Check a stream of solutions, yielding the game id (from 1) of
+    each one and why it's invalid (see ``check_solution``) or ``None``.
+
+    With NumPy, solutions are checked in batches of ``batch_size`` by
+    ``check_solution_batch`` and only the invalid ones are checked again
+    one by one for the reason.
+
+    """
+    puzzles = enumerate(puzzles, 1)
+
+    if numpy is None:
+        for game_id, puzzle in puzzles:
+            yield game_id, check_solution(puzzle)
+        return
+
+    while True:
+        batch = list(itertools.islice(puzzles, batch_size))
+        if not batch:
+            return
+
+        # Batches are split where the size of the puzzles changes
+        for length, group in itertools.groupby(
+                batch, lambda item: len(item[1])):
+            group = list(group)
+            valid = check_solution_batch([puzzle for game_id, puzzle
+                                          in group])
+            for (game_id, puzzle), is_valid in zip(group, valid):
+                yield game_id, None if is_valid else check_solution(puzzle)
+
+
+def propagate_batch(puzzles):
+    """Apply naked and hidden singles to many puzzles at once with NumPy.
+
+    ``puzzles`` is a list of strings like the ones of ``Game.to_string``.
+    Boards are kept in a ``(N, 81)`` array of values and a ``(N, 81)``
+    array of possibilities masks, updated for every board at once using
+    the unit index tables. Returns the propagated puzzles and a list
+    with ``True`` for the ones that got solved, ``False`` for the ones
+    found to have no solution and ``None`` for the ones still to search.
+
+    """
+    if numpy is None:
+        raise RuntimeError('The numpy engine requires NumPy')
+
+    units = numpy.array(LINES + COLUMNS + REGIONS)
+    position_units = numpy.array([(i, 9 + j, 18 + k) for i, j, k in UNITS])
+    bit_count = numpy.array(BIT_COUNT, dtype=numpy.uint8)
+    lowest_value = numpy.array(LOWEST_VALUE).clip(0).astype(numpy.uint8)
+    value_bits = numpy.array([1 << value for value in range(10)],
+                             dtype=numpy.uint16)
+    value_bits[0] = 0
+
+    data = ''.join(puzzles).replace('.', '0').encode('ascii')
+    if len(data) != 81 * len(puzzles):
+        raise ValueError('The numpy engine only solves 9x9 games')
+    values = numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, 81) - 48
+    failed = numpy.zeros(len(values), dtype=bool)
+    shifts = numpy.arange(1, 10, dtype=numpy.uint16)
+
+    # Boards changed by the last step, the only ones worth checking again
+    active = numpy.arange(len(values))
+
+    while len(active):
+        board_values = values[active]
+        empty = board_values == 0
+        bits = value_bits[board_values]
+
+        # Values already placed on every unit, catching duplicates
+        placed = numpy.bitwise_or.reduce(bits[:, units], axis=2)
+        board_failed = (bit_count[placed] !=
+                        (~empty[:, units]).sum(axis=2)).any(axis=1)
+
+        masks = ALL_VALUES & ~(placed[:, position_units[:, 0]] |
+                               placed[:, position_units[:, 1]] |
+                               placed[:, position_units[:, 2]])
+        masks[~empty] = 0
+        board_failed |= (empty & (masks == 0)).any(axis=1)
+
+        # Naked singles
+        inferred = numpy.where(empty & (bit_count[masks] == 1),
+                               lowest_value[masks], 0).astype(numpy.uint8)
+
+        # Hidden singles: values available in a single position of a unit
+        candidates = ((masks[:, :, None] >> shifts) & 1).astype(numpy.uint8)
+        unit_candidates = candidates[:, units, :]
+        counts = unit_candidates.sum(axis=2, dtype=numpy.uint8)
+        missing = (placed[:, :, None] >> shifts) & 1 == 0
+        board_failed |= (missing & (counts == 0)).any(axis=(1, 2))
+
+        board, unit, value = numpy.nonzero(missing & (counts == 1))
+        member = unit_candidates[board, unit, :, value].argmax(axis=1)
+        inferred[board, units[unit, member]] = value + 1
+
+        inferred[board_failed] = 0
+        failed[active] = board_failed
+        changed = inferred.any(axis=1)
+
+        values[active[changed]] += inferred[changed]
+        active = active[changed]
+
+    status = numpy.where(failed, 0, numpy.where(values.all(axis=1), 1, 2))
+    propagated = (values + 48).astype(numpy.uint8).tobytes().decode('ascii')
+
+    return ([propagated[start:start + 81]
+             for start in range(0, len(propagated), 81)],
+            [(False, True, None)[code] for code in status])
+
+
+def read_matrices(file_obj=sys.stdin, box_size=None, strict=True):
+    """Yield the lines of values (as strings) of each game in a file.
+
+    Games have as many lines as values on their first line, unless a
+    ``box_size`` is given. The first line of the file may hold the
+    number of games it contains, in which case a warning is logged if it
+    doesn't match the number of games read. Lines with another number
+    of values raise ``ValueError`` unless ``strict`` is false, in which
+    case they are read like the others, and blank lines and the end of
+    the file also end a game cut short.
+
+    """
+    expected = None
+    count = 0
+    matrix = []
+    size = box_size * box_size if box_size else None
+
+    for number, str_line in enumerate(file_obj, 1):
+        line = str_line.split()
+
+        if not line:
+            if matrix and not strict:
+                yield matrix
+                matrix = []
+                count += 1
+            continue
+
+        if (expected is None and not count and not matrix and
+                len(line) == 1 and (strict or line[0].isdigit())):
+            expected = int(line[0])
+            continue
+
+        if not matrix and not box_size:
+            size = len(line) if box_size_for(len(line)) else None
+
+        if len(line) != size and strict:
+            raise ValueError('Invalid game line %s: %r' % (number, str_line))
+
+        matrix.append(line)
+
+        if len(matrix) == size:
+            yield matrix
+            matrix = []
+            count += 1
+
+    if matrix and not strict:
+        yield matrix
+        count += 1
+
+    if expected is not None and expected != count:
+        logging.warning('Expected %s games but read %s', expected, count)
+
+
+def read_lines(file_obj=sys.stdin, box_size=None, strict=True):
+    """Yield the puzzles of a file with one puzzle per line.
+
+    Like ``read_matrices``, the first line may hold the number of games.
+    Puzzles may have any size, or the one of ``box_size`` if given.
+    Lines of other lengths raise ``ValueError`` or, unless ``strict``,
+    are yielded as they are.
+
+    """
+    expected = None
+    count = 0
+
+    for number, str_line in enumerate(file_obj, 1):
+        str_line = str_line.strip()
+
+        if not str_line:
+            continue
+
+        length = len(str_line)
+        if (expected is None and not count and
+                puzzle_box_size(length) is None and
+                (strict or str_line.isdigit() and length < 10)):
+            expected = int(str_line)
+            continue
+
+        if strict and (puzzle_box_size(length) is None or
+                       box_size and length != box_size ** 4):
+            raise ValueError('Invalid game line %s: %r' % (number, str_line))
+
+        yield str_line
+        count += 1
+
+    if expected is not None and expected != count:
+        logging.warning('Expected %s games but read %s', expected, count)
+
+
+def map_file(file_obj):
+    """Return a read only ``mmap`` of ``file_obj`` or ``None``.
+
+    Only regular, non empty files can be mapped.
+
+    """
+    try:
+        fileno = file_obj.fileno()
+        if not stat.S_ISREG(os.fstat(fileno).st_mode):
+            return
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (AttributeError, IOError, OSError, ValueError):
+        return
+
+
+def read_mapped_lines(data, box_size=None):
+    """Yield the puzzles of a memory-mapped file in the one line format.
+
+    Every puzzle line must have the same length, so they are sliced at a
+    fixed stride from blocks of ``MMAP_CHUNKSIZE`` lines, decoded at once.
+
+    """
+    size = len(data)
+
+    start = 0
+    end = data.find(b'\n')
+    if end == -1:
+        end = size
+
+    expected = None
+    if puzzle_box_size(len(data[:end].strip())) is None:
+        expected = int(data[:end])
+        start = end + 1
+
+    end = data.find(b'\n', start)
+    stride = end - start + 1 if end != -1 else size - start
+    cells = len(data[start:start + stride].rstrip())
+    if start < size and (puzzle_box_size(cells) is None or
+                         box_size and cells != box_size ** 4):
+        raise ValueError('Invalid game line: %r' % data[start:start + stride])
+
+    blanks = bytes.maketrans(b'.', b'0')
+
+    count = 0
+    for offset in range(start, size, stride * MMAP_CHUNKSIZE):
+        block = data[offset:offset + stride * MMAP_CHUNKSIZE]
+        block = block.translate(blanks).decode('ascii')
+
+        if not set(block[cells::stride]) <= {'\r', '\n'}:
+            raise ValueError('Games must be on lines of the same length')
+
+        for k in range(0, len(block) - cells + 1, stride):
+            yield block[k:k + cells]
+            count += 1
+
+    if expected is not None and expected != count:
+        logging.warning('Expected %s games but read %s', expected, count)
+
 
-    The difference between ``tested`` and the intersection of
-    ``column``, ``line`` and ``region`` give the current available
-    possibilities.
+def open_puzzles(file_obj=sys.stdin, puzzle_format=None, box_size=None,
+                 strict=True):
+    """Return the format of ``file_obj`` and an iterator of its puzzles.
 
-    This class also implements the iterator pattern always returning
-    the first possibility available. This possibility is also added
-    ``tested``.
+    Puzzles are strings of values like the ones of ``Game.to_string``.
+    ``puzzle_format`` is either ``grid`` (nine lines of nine values per
+    9x9 game) or ``line`` (one line of 81 values per 9x9 game). If
+    ``None`` it is detected from the first game in the file. Grids of
+    games with more than 9 values may have them as numbers or as
+    ``VALUE_CHARS``. Games of other sizes than ``box_size``, if given,
+    are refused. Unless ``strict``, malformed games are read as they
+    are, with values that aren't numbers nor ``VALUE_CHARS`` read as
+    ``?``, for ``check_solution`` to report them.
 
     """
+    lines = iter(file_obj)
+
+    if puzzle_format is None:
+        read = []
+        for str_line in lines:
+            read.append(str_line)
+            values = str_line.split()
+            if len(values) > 1:
+                puzzle_format = 'grid'
+            elif values and puzzle_box_size(len(values[0])):
+                puzzle_format = 'line'
+            else:
+                continue
+            break
 
-    def __init__(self):
-        self.column = set(range(1, 10))
-        self.line = set(range(1, 10))
-        self.region = set(range(1, 10))
-        self.tested = set()
+        lines = itertools.chain(read, lines)
 
-    @property
-    def available(self):
-        return (self.line & self.region & self.column) - self.tested
+    if puzzle_format == 'line':
+        data = map_file(file_obj) if strict else None
+        if data is not None:
+            return puzzle_format, read_mapped_lines(data, box_size)
+        return puzzle_format, read_lines(lines, box_size, strict)
 
-    def __len__(self):
-        return len(self.available)
+    def value_char(value):
+        if len(value) == 1:
+            return value
+        if strict:
+            return VALUE_CHARS[int(value)]
+        try:
+            number = int(value)
+        except ValueError:
+            return '?'
+        return VALUE_CHARS[number] if 0 <= number < len(VALUE_CHARS) else '?'
 
-    def _to_list(self):
-        return sorted(self.available)
+    return 'grid', (''.join(''.join(value_char(value) for value in line)
+                            for line in matrix)
+                    for matrix in read_matrices(lines, box_size, strict))
 
-    def next(self):
-        possibilities = self._to_list()
 
-        # If no possibilities are available raise StopIteration
-        #   to stop the for loop
-        if not possibilities:
-            raise StopIteration
+def iter_games(forward_check=None, mrv=False, max_attempts=0,
+               file_obj=sys.stdin, puzzle_format=None, box_size=None,
+               **kwargs):
+    """Yield a ``Game`` for each game in ``file_obj`` as it is read."""
+    for puzzle in open_puzzles(file_obj, puzzle_format, box_size)[1]:
+        yield Game.from_string(puzzle, forward_check=forward_check, mrv=mrv,
+                               max_attempts=max_attempts, box_size=box_size,
+                               **kwargs)
 
-        possibility = possibilities.pop(0)
-        self.tested.add(possibility)
-        return possibility
 
-    def __next__(self):
-        return self.next()
+def parse_input(forward_check=None, mrv=False, max_attempts=0,
+                file_obj=sys.stdin, box_size=None, **kwargs):
+    return list(iter_games(forward_check, mrv, max_attempts, file_obj,
+                           box_size=box_size, **kwargs))
 
-    def __iter__(self):
-        return self
 
-    def __str__(self):
-        logging.debug('Line possibilities: %s', self.line)
-        logging.debug('Column possibilities: %s', self.column)
-        logging.debug('Region possibilities: %s', self.region)
-        return str(self._to_list())
+class OutputWriter(object):
+    """Buffers the output of many games in a single write.
 
-    def __repr__(self):
-        return str(self)
+    The buffer is flushed once it holds ``size`` characters or
+    ``interval`` seconds after the last flush, so results of slow games
+    still show up as they are solved.
 
+    """
 
-class GamePosition(object):
-    def __init__(self, value, game, i, j):
-        self._value = 0
-        self.possibilities = Possibilities()
-        self.game = game
-        self.i = i
-        self.j = j
-        self.value = int(value)
+    def __init__(self, stream=sys.stdout, size=1 << 16, interval=0.1):
+        self.stream = stream
+        self.size = size
+        self.interval = interval
+        self.buffer = []
+        self.buffered = 0
+        self.flushed_at = time.time()
 
-    def remove_possibilities(self, value):
-        for position in self.line:
-            if value in position.possibilities.line:
-                position.possibilities.line.remove(value)
+    def write(self, text):
+        self.buffer.append(text)
+        self.buffered += len(text)
 
-        for position in self.column:
-            if value in position.possibilities.column:
-                position.possibilities.column.remove(value)
+        if (self.buffered >= self.size or
+                time.time() - self.flushed_at >= self.interval):
+            self.flush()
 
-        for position in self.region:
-            if value in position.possibilities.region:
-                position.possibilities.region.remove(value)
+    def flush(self):
+        self.stream.write(''.join(self.buffer))
+        self.stream.flush()
+        self.buffer = []
+        self.buffered = 0
+        self.flushed_at = time.time()
 
-    def add_possibilities(self, value):
-        for position in self.line:
-            position.possibilities.line.add(value)
 
-        for position in self.column:
-            position.possibilities.column.add(value)
+def _tied_orders(items, key):
+    """Return every order of ``items`` sorted by ``key``, in any order
+    among the ones with the same key."""
+    items = sorted(items, key=key)
+    groups = [list(group) for k, group in itertools.groupby(items, key)]
+    return [list(itertools.chain.from_iterable(order))
+            for order in itertools.product(
+                *[itertools.permutations(group) for group in groups])]
 
-        for position in self.region:
-            position.possibilities.region.add(value)
 
-    @property
-    def value(self):
-        return self._value
+def _line_orders(given, stride, step):
+    """Return the orders of the lines of ``given`` worth trying.
 
-    @value.setter
-    def value(self, value):
+    Lines are the rows of ``given`` (a list of 81 booleans) with
+    ``stride`` 9 and ``step`` 1, or its columns with 1 and 9. Bands of
+    lines and lines in a band are sorted by their number of givens in
+    each block, which doesn't change with the symmetries of the game.
 
-        if value == self._value:
-            return
+    """
+    def counts(line):
+        start = line * stride
+        return sorted(sum(given[start + (block * 3 + k) * step]
+                          for k in range(3)) for block in range(3))
+
+    def line_key(line):
+        line_counts = counts(line)
+        return sum(line_counts), line_counts
+
+    def band_key(band):
+        return sorted(line_key(line) for line in range(band * 3, band * 3 + 3))
+
+    orders = []
+    for bands in _tied_orders(range(3), band_key):
+        for lines in itertools.product(*[
+                _tied_orders(range(band * 3, band * 3 + 3), line_key)
+                for band in bands]):
+            orders.append(list(itertools.chain.from_iterable(lines)))
+    return orders
+
+
+def canonical_form(puzzle):
+    """Return the canonical form of ``puzzle`` and the transform to it.
+
+    Puzzles that are the same up to transposition, permutations of bands,
+    stacks and of the lines and columns in them and relabeling of values
+    usually have the same canonical form: the lexicographically smallest
+    of the ones reachable by the orders of ``_line_orders``. When these
+    are more than ``CANONICAL_TIE_LIMIT``, only the first one is tried,
+    so the form is still valid but may differ between equivalent
+    puzzles. The transform is given to ``apply_transform``.
 
-        logging.debug('Setting position [%s][%s] from %s to %s',
-                      self.i, self.j, self.value, value)
+    """
+    values = [int(value) for value in puzzle.replace('.', '0')]
+    best = None
+
+    for transposed in (False, True):
+        if transposed:
+            values = [values[j * 9 + i] for i in range(9) for j in range(9)]
+        given = [bool(value) for value in values]
+
+        rows = _line_orders(given, 9, 1)
+        columns = _line_orders(given, 1, 9)
+        if len(rows) * len(columns) > CANONICAL_TIE_LIMIT:
+            rows, columns = rows[:1], columns[:1]
+
+        for row_order in rows:
+            for column_order in columns:
+                labels = [0] * 10
+                label = 1
+                form = []
+                for i in row_order:
+                    for j in column_order:
+                        value = values[i * 9 + j]
+                        if value and not labels[value]:
+                            labels[value] = label
+                            label += 1
+                        form.append(labels[value])
+
+                if best is None or form < best[0]:
+                    best = form, transposed, row_order, column_order, labels
+
+    form, transposed, row_order, column_order, labels = best
+
+    # Values missing from the puzzle get the labels left, in order
+    for value in range(1, 10):
+        if not labels[value]:
+            labels[value] = label
+            label += 1
+
+    return (''.join(map(str, form)),
+            (transposed, row_order, column_order, labels))
+
+
+def apply_transform(transform, puzzle, inverse=False):
+    """Apply a transform of ``canonical_form`` (or its inverse) to
+    ``puzzle``."""
+    transposed, row_order, column_order, labels = transform
+
+    if inverse:
+        inverse_labels = [0] * 10
+        for value, label in enumerate(labels):
+            inverse_labels[label] = value
+
+        values = [0] * 81
+        for i, row in enumerate(row_order):
+            for j, column in enumerate(column_order):
+                values[row * 9 + column] = inverse_labels[
+                    int(puzzle[i * 9 + j])]
+        if transposed:
+            values = [values[j * 9 + i] for i in range(9) for j in range(9)]
+        return ''.join(map(str, values))
+
+    values = [int(value) for value in puzzle.replace('.', '0')]
+    if transposed:
+        values = [values[j * 9 + i] for i in range(9) for j in range(9)]
+    return ''.join(str(labels[values[i * 9 + j]])
+                   for i in row_order for j in column_order)
+
+
+class SolutionCache(object):
+    """Solutions of puzzles, found by their canonical form.
+
+    Keeps the last ``size`` puzzles used in memory and, if ``path`` is
+    given, every puzzle in a SQLite database there, so solutions are
+    kept across runs. Both map a puzzle string to a solution of it: the
+    ones given to ``store`` and their canonical forms.
 
-        if not value:
-            logging.debug('Added %s back to possibilities', self._value)
-            self.add_possibilities(self._value)
+    """
+
+    def __init__(self, size=CACHE_SIZE, path=None):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.database = None
+        self.uncommitted = 0
+        self.pending = {}
+
+        if path is not None:
+            self.database = sqlite3.connect(path)
+            self.database.execute('CREATE TABLE IF NOT EXISTS solutions '
+                                  '(puzzle TEXT PRIMARY KEY, solution TEXT)')
+
+    def _get(self, puzzle):
+        try:
+            solution = self.entries.pop(puzzle)
+        except KeyError:
+            if self.database is None:
+                return
+            row = self.database.execute(
+                'SELECT solution FROM solutions WHERE puzzle = ?',
+                (puzzle,)).fetchone()
+            if row is None:
+                return
+            solution = row[0]
+
+        self._put(puzzle, solution)
+        return solution
+
+    def _put(self, puzzle, solution):
+        self.entries.pop(puzzle, None)
+        self.entries[puzzle] = solution
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def lookup(self, puzzle):
+        """Return a solution of ``puzzle`` or ``None`` if not cached."""
+        puzzle = puzzle.replace('.', '0')
+        solution = self._get(puzzle)
+
+        if solution is None and len(puzzle) == 81:
+            form, transform = canonical_form(puzzle)
+            solution = self._get(form)
+            if solution is not None:
+                solution = apply_transform(transform, solution, inverse=True)
+                self._put(puzzle, solution)
+
+        if solution is None:
+            self.misses += 1
         else:
-            logging.debug('Removed %s from possibilities', value)
-            self.remove_possibilities(value)
-            self.game.attempts_count += 1
+            self.hits += 1
+        return solution
+
+    def store(self, puzzle, solution):
+        puzzle = puzzle.replace('.', '0')
+        entries = [(puzzle, solution)]
+        if len(puzzle) == 81:
+            form, transform = canonical_form(puzzle)
+            entries.append((form, apply_transform(transform, solution)))
+
+        for key, value in entries:
+            self._put(key, value)
+
+        if self.database is not None:
+            self.database.executemany(
+                'INSERT OR REPLACE INTO solutions VALUES (?, ?)', entries)
+            self.uncommitted += 1
+            if self.uncommitted >= CACHE_COMMIT_INTERVAL:
+                self.commit()
+
+    def filter(self, puzzles):
+        """Yield each of ``puzzles`` with its solution found in the cache,
+        or ``None``. The output of the games not found is to be given
+        back to ``store_output``, with their number from 1."""
+        for game_id, puzzle in enumerate(puzzles, 1):
+            solution = self.lookup(puzzle)
+            if solution is None:
+                self.pending[game_id] = puzzle
+            yield puzzle, solution
+
+    def store_output(self, game_id, output):
+        """Store the solution printed for a game yielded by ``filter``."""
+        puzzle = self.pending.pop(game_id, None)
+        if puzzle is None:
+            return
 
-            if self.game.max_attempts > 0:
-                # Abort if number of attempts exceed maximum value set
-                if self.game.attempts_count > self.game.max_attempts:
-                    print('Numero de atribuicoes excede limite maximo\n')
-                    logging.info('Number of attempts %s',
-                                 self.game.attempts_count)
-                    raise MaxAttemptsExceeded
+        solution = ''.join(output.split())
+        if (len(solution) == len(puzzle) and
+                set(solution) <= set(VALUE_CHARS[1:])):
+            self.store(puzzle, solution)
 
-        self._value = value
+    def commit(self):
+        if self.database is not None:
+            self.database.commit()
+            self.uncommitted = 0
 
-    @property
-    def line(self):
-        for position in self.game.matrix[self.i]:
-            if position != self:
-                yield position
+    def close(self):
+        self.commit()
+        if self.database is not None:
+            self.database.close()
+            self.database = None
 
     @property
-    def column(self):
-        for line in self.game.matrix:
-            if line[self.j] != self:
-                yield line[self.j]
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / float(lookups) if lookups else 0.0
 
-    @property
-    def region(self):
-        start_i = self.i // 3 * 3
-        start_j = self.j // 3 * 3
 
-        for i in range(start_i, start_i + 3):
-            for j in range(start_j, start_j + 3):
-                if self.game.matrix[i][j] != self:
-                    yield self.game.matrix[i][j]
+def cached_result(solution, puzzle_format='grid'):
+    """Return the text printed for a solution found by ``SolutionCache``
+    and its ``GameStats``, with the ``'cached'`` status."""
+    stats = GameStats()
+    stats.status = 'cached'
+    stats.solutions = 1
 
-    @property
-    def coordinates(self):
-        return self.i, self.j
+    start = time.time()
+    output = format_puzzle(solution, puzzle_format)
+    stats.times['output'] = time.time() - start
 
-    def __str__(self):
-        return str(self.coordinates)
+    return output, stats
 
-    def __repr__(self):
-        return str(self)
 
+def solve_cached(cache, puzzles, solve, puzzle_format='grid'):
+    """Solve the puzzles not found in ``cache`` with ``solve``.
 
-class Game(object):
+    ``solve`` is given an iterable with the puzzles of ``puzzles`` not
+    found in the cache and yields the game id (from 1), the text to be
+    printed and the ``GameStats`` of each one, like ``solve_parallel``.
+    Yields them with the id of the game in ``puzzles`` instead, storing
+    the solutions in the cache, along with the results of the games
+    found in it (see ``cached_result``), which come before the first
+    result of a later game.
 
-    def __init__(self, matrix, forward_check=False, mrv=False, max_attempts=0):
-        self.forward_check = forward_check
-        self.mrv = mrv
-        self.last_moves = []
-        self.backtracking = False
-        self.attempts_count = 0
-        self.max_attempts = max_attempts
-        self.id = None
+    """
+    hits = collections.deque()
+    game_ids = {}
+
+    def misses():
+        miss_ids = itertools.count(1)
+        for game_id, (puzzle, solution) in enumerate(cache.filter(puzzles),
+                                                     1):
+            if solution is None:
+                game_ids[next(miss_ids)] = game_id
+                yield puzzle
+            else:
+                hits.append((game_id, solution))
 
-        # Start an empty game
-        self.empty_game()
+    def cached(before=None):
+        while hits and (before is None or hits[0][0] < before):
+            game_id, solution = hits.popleft()
+            yield (game_id,) + cached_result(solution, puzzle_format)
 
-        # Initialize the game with input data
-        self.init_game(matrix)
+    for miss_id, output, stats in solve(misses()):
+        game_id = game_ids.pop(miss_id)
+        for result in cached(game_id):
+            yield result
+        cache.store_output(game_id, output)
+        yield game_id, output, stats
 
-    def init_game(self, matrix):
-        self.available_moves = []
+    for result in cached():
+        yield result
 
-        for i, line in enumerate(matrix):
-            for j, value in enumerate(line):
-                position = self.matrix[i][j]
-                position.value = int(value)
-                if not position.value:
-                    self.available_moves.append(position)
 
-    def empty_game(self):
-        self.matrix = []
+def solve_game(game, puzzle_format='grid', count_limit=None):
+    """Solve a game and return the text to be printed for it.
 
-        for i in range(9):
-            line = []
-            for j in range(9):
-                line.append(GamePosition(0, self, i, j))
-            self.matrix.append(line)
+    If ``count_limit`` is given, the game's solutions are counted up to
+    it instead (see ``Game.count_solutions``) and the text is the count.
 
-    def log_step(self, position=None):
-        if position:
-            logging.debug('Current position: %s', position.coordinates)
+    """
+    try:
+        if count_limit is None:
+            game.solve()
         else:
-            logging.debug('Current position: n/a')
+            count = game.count_solutions(count_limit)
+    except MaxAttemptsExceeded:
+        return MAX_ATTEMPTS_MESSAGE
+    except TimeLimitExceeded:
+        return TIME_LIMIT_MESSAGE
 
-        logging.debug('Current status:\n%s', self)
+    if count_limit is not None:
+        return '%s\n' % count
 
-        logging.debug('Available moves (%s): %s',
-                      len(self.available_moves),
-                      self.available_moves)
+    return game_output(game, puzzle_format)
 
-        logging.debug('Last moves: %s', self.last_moves)
 
-        if position:
-            logging.debug('Possibilities: %s', position.possibilities)
+def solve_all(game, puzzle_format='grid'):
+    """Yield the text printed for each solution of a game as it is found
+    (see ``Game.iter_solutions``), then the number of solutions.
+
+    Grids are followed by a blank line. If the game exceeds its limits
+    the message is yielded instead of the number.
+
+    """
+    separator = '\n' if puzzle_format == 'grid' else ''
+    try:
+        for solution in game.iter_solutions():
+            yield format_puzzle(solution, puzzle_format) + separator
+    except MaxAttemptsExceeded:
+        yield MAX_ATTEMPTS_MESSAGE
+    except TimeLimitExceeded:
+        yield TIME_LIMIT_MESSAGE
+    else:
+        yield '%s\n' % game.stats.solutions
+
+
+def game_output(game, puzzle_format='grid'):
+    """Return the text printed for a game already searched."""
+    start = time.time()
+    if puzzle_format == 'line':
+        output = game.to_string() + '\n'
+    else:
+        output = str(game)
+    game.stats.times['output'] = time.time() - start
+
+    return output
+
+
+def solve_interleaved(puzzles, game_options, puzzle_format='grid',
+                      slice_size=SLICE_SIZE, in_flight=SCHEDULE_IN_FLIGHT,
+                      demote_after=0):
+    """Solve ``puzzles`` searching many at once, a slice at a time.
+
+    Up to ``in_flight`` games, created with ``game_options``, are given
+    a slice of ``slice_size`` attempts (see ``Game.solve_steps``) in
+    turn, taking new puzzles as games finish, so a hard game doesn't
+    hold back the easy ones after it. Games that took more than
+    ``demote_after`` attempts, if given, are moved to a low priority
+    lane, which only gets a slice every ``LOW_LANE_INTERVAL`` turns or
+    when there is nothing else to search. Yields the game id (from 1),
+    the text to be printed and the ``GameStats`` of each game, as soon
+    as it finishes.
+
+    """
+    puzzles = enumerate(puzzles, 1)
+    lane = collections.deque()
+    low_lane = collections.deque()
+    turn = 0
+
+    while True:
+        while puzzles is not None and len(lane) < in_flight:
+            try:
+                game_id, puzzle = next(puzzles)
+            except StopIteration:
+                puzzles = None
+                break
+
+            game = Game.from_string(puzzle, **game_options)
+            game.id = game_id
+            lane.append((game, game.solve_steps(slice_size), False))
+
+        if not lane and not low_lane:
+            return
+
+        turn += 1
+        if low_lane and (not lane or turn % LOW_LANE_INTERVAL == 0):
+            game, steps, demoted = low_lane.popleft()
+        else:
+            game, steps, demoted = lane.popleft()
+
+        try:
+            next(steps)
+        except StopIteration:
+            yield game.id, game_output(game, puzzle_format), game.stats
+        except MaxAttemptsExceeded:
+            yield game.id, MAX_ATTEMPTS_MESSAGE, game.stats
+        except TimeLimitExceeded:
+            yield game.id, TIME_LIMIT_MESSAGE, game.stats
+        else:
+            if (not demoted and demote_after and
+                    game.attempts_count > demote_after):
+                logging.info('Game #%s demoted after %s attempts', game.id,
+                             game.attempts_count)
+                demoted = True
+            (low_lane if demoted else lane).append((game, steps, demoted))
+
+
+def format_puzzle(puzzle, puzzle_format='grid'):
+    """Return the text printed for a solved puzzle string."""
+    if puzzle_format == 'line':
+        return puzzle + '\n'
+
+    size = int(round(len(puzzle) ** 0.5))
+    return ''.join(' '.join(puzzle[start:start + size]) + '\n'
+                   for start in range(0, len(puzzle), size))
+
+
+def solve_batches(puzzles, game_options, puzzle_format='grid',
+                  count_limit=None):
+    """Solve puzzles with ``propagate_batch``, searching the unsolved ones.
+
+    Puzzles are propagated in batches of ``NUMPY_BATCHSIZE``. The ones
+    not solved by propagation are searched by a ``Game`` created with
+    ``game_options`` from the propagated puzzle, while the ones found to
+    have no solution are printed as they were given. Yields the game id
+    (from 1), the text to be printed and the ``GameStats``, with its
+    share of the batch in the search time, of each puzzle in input
+    order, like ``solve_parallel``. With ``count_limit`` the
+    solutions are counted as in ``solve_game``; puzzles solved or found
+    to have no solution by propagation have one and none.
+
+    """
+    puzzles = iter(puzzles)
+    game_id = 0
+
+    while True:
+        batch = list(itertools.islice(puzzles, NUMPY_BATCHSIZE))
+        if not batch:
+            return
 
-    def solve(self):
         start = time.time()
-        for position in self:
-            for value in position.possibilities:
-                if self.forward_checking(position, value):
-                    position.value = value
-                    break
-            else:
-                self.backtrack(position)
+        propagated, solved = propagate_batch(batch)
         elapsed = time.time() - start
-        logging.info('Game #%s solved with %s attempts in %.2f seconds',
-                     self.id, self.attempts_count, elapsed)
+        logging.info('Propagated %s games in %.2f seconds', len(batch),
+                     elapsed)
+
+        for puzzle, result, is_solved in zip(batch, propagated, solved):
+            game_id += 1
+
+            if is_solved:
+                logging.info('Game #%s solved by propagation', game_id)
+                game_stats = GameStats()
+                game_stats.status = 'solved'
+                game_stats.solutions = 1
+                game_stats.propagated = (puzzle.count('0') +
+                                         puzzle.count('.'))
+                if count_limit is None:
+                    output = format_puzzle(result, puzzle_format)
+                else:
+                    output = '1\n'
+            elif is_solved is False:
+                logging.info('Game #%s has no solution', game_id)
+                game_stats = GameStats()
+                game_stats.status = 'unsolved'
+                if count_limit is None:
+                    output = format_puzzle(puzzle.replace('.', '0'),
+                                           puzzle_format)
+                else:
+                    output = '0\n'
+            else:
+                game = Game.from_string(result, **game_options)
+                game.id = game_id
+                output = solve_game(game, puzzle_format, count_limit)
+                game_stats = game.stats
 
-    def forward_checking(self, target_position, value):
-        if not self.forward_check:
-            return True
+            game_stats.times['search'] += elapsed / len(batch)
+            yield game_id, output, game_stats
 
-        logging.debug('Forward Checking possibility %s', value)
-        positions = set(itertools.chain(target_position.line,
-                                        target_position.column,
-                                        target_position.region))
 
-        for position in positions:
-            if position.value != 0:
-                continue
+def solve_puzzle(task):
+    """Solve a game in a worker process.
 
-            if not position.possibilities.available - {value}:
-                logging.debug('Forward Checking failed on position %s',
-                              position)
-                return False
+    ``task`` is a tuple with the game id, the puzzle as returned by
+    ``Game.to_string``, the keyword arguments for ``Game``, the output
+    format and, optionally, the ``count_limit`` of ``solve_game``.
+    Returns the game id, the text to be printed for it and its
+    ``GameStats``.
 
-        return True
+    """
+    game_id, puzzle, kwargs, puzzle_format = task[:4]
+    count_limit = task[4] if len(task) > 4 else None
+    game = Game.from_string(puzzle, **kwargs)
+    game.id = game_id
+    return (game_id, solve_game(game, puzzle_format, count_limit),
+            game.stats)
 
-    def backtrack(self, position):
-        logging.debug('Backtracking!')
 
-        while not position.possibilities:
-            logging.debug('No possibilities for [%s][%s]',
-                          *position.coordinates)
-            position.possibilities.tested.clear()
-            position = self.previous()
-            position.value = 0
+def solve_parallel(tasks, jobs, ordered=True):
+    """Solve ``tasks`` (see ``solve_puzzle``) using ``jobs`` processes.
 
-        self.backtracking = True
+    Yields the results of ``solve_puzzle`` in the same order as
+    ``tasks`` or, if ``ordered`` is ``False``, as soon as they finish.
 
-    def next(self):
-        if self.backtracking:
-            self.backtracking = False
-            return self.current_position
+    """
+    pool = multiprocessing.Pool(jobs)
 
-        if not self.available_moves:
-            raise StopIteration
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for result in imap(solve_puzzle, tasks, JOBS_CHUNKSIZE):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
 
-        if self.mrv:
-            logging.debug('Sorting by min possibilities remaining')
-            self.available_moves.sort(key=lambda position:
-                                      len(position.possibilities))
 
-        position = self.available_moves.pop(0)
+def check_puzzle(puzzle):
+    """Raise ``ValueError`` unless ``puzzle`` is a puzzle string (see
+    ``Game.to_string``) of a supported size."""
+    box_size = puzzle_box_size(len(puzzle))
+    if box_size is None:
+        raise ValueError('Invalid puzzle with %s values' % len(puzzle))
 
-        logging.debug('Moving from %s to %s', self.current_position, position)
+    size = box_size * box_size
+    for char in puzzle:
+        if CHAR_VALUES.get(char, size + 1) > size:
+            raise ValueError('Invalid value %r' % char)
 
-        self.last_moves.append(position)
 
-        self.log_step(position)
-        return position
+def warm_worker():
+    """Build the tables of every ``Board`` in a new worker process, so
+    they are ready for every game it gets."""
+    for box_size in range(2, MAX_BOX_SIZE + 1):
+        Board.get(box_size)
 
-    def __next__(self):
-        return self.next()
 
-    def previous(self):
-        if len(self.last_moves) == 1:
-            raise StopIteration
+def solve_batch(tasks):
+    """Solve ``tasks`` (see ``solve_puzzle``) in a worker process.
 
-        last_position = self.last_moves.pop()
+    Returns the text to be printed for each one.
 
-        logging.debug('Moving from %s to %s', last_position,
-                      self.current_position)
+    """
+    return [solve_puzzle(task)[1] for task in tasks]
 
-        self.available_moves.insert(0, last_position)
 
-        self.log_step(self.current_position)
+class SolverServer(object):
+    """Solves the puzzles sent by clients over a socket.
 
-        return self.current_position
+    Clients send puzzles in the line format, one per line, and get a
+    line back for each one with its solution or the message printed
+    instead (see ``solve_game``), in the same order. Invalid puzzles
+    get ``INVALID_PUZZLE_MESSAGE``.
+
+    Puzzles of every connection are queued and sent in batches of up to
+    ``batch_size`` to a pool of ``jobs`` worker processes, started once
+    with the tables they need. A batch is sent once full or after
+    waiting ``batch_delay`` seconds for more puzzles, and at most two
+    batches per worker are sent at once. Once ``max_pending`` puzzles
+    are queued or being solved, or a client stops reading its
+    solutions, the server stops reading puzzles until some are done.
+
+    """
+
+    def __init__(self, game_options, jobs=1, batch_size=SERVE_BATCHSIZE,
+                 batch_delay=SERVE_BATCH_DELAY,
+                 max_pending=SERVE_MAX_PENDING):
+        self.game_options = game_options
+        self.jobs = jobs
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_pending = max_pending
+        self.games = 0
+        self.server = None
+        self.connections = set()
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """Start listening on the Unix socket at ``path`` or, if not
+        given, on ``host`` and ``port``. Returns the address bound."""
+        self.queue = asyncio.Queue()
+        self.pending = asyncio.Semaphore(self.max_pending)
+        self.batches = asyncio.Semaphore(self.jobs * 2)
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            self.jobs, initializer=warm_worker)
+
+        # Start the workers now instead of on the first batch
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.executor,
+                                                    solve_batch, [])
+                               for i in range(self.jobs)])
+
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path)
+            address = path
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+            address = self.server.sockets[0].getsockname()[:2]
+
+        self.dispatcher = asyncio.ensure_future(self.dispatch())
+        logging.info('Serving on %s with %s workers', address, self.jobs)
+        return address
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+        for task in self.connections:
+            task.cancel()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+
+        self.dispatcher.cancel()
+        self.executor.shutdown()
+
+    async def handle(self, reader, writer):
+        """Read the puzzles of a client, queueing a future for each."""
+        loop = asyncio.get_running_loop()
+        responses = asyncio.Queue(self.max_pending)
+        sender = asyncio.ensure_future(self.send(responses, writer))
+        task = asyncio.current_task()
+        self.connections.add(task)
 
-    @property
-    def current_position(self):
         try:
-            position = self.last_moves[-1]
-        except IndexError:
-            return
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
 
-        return position
+                puzzle = line.decode('ascii', 'replace').strip()
+                if not puzzle:
+                    continue
+
+                future = loop.create_future()
+                try:
+                    check_puzzle(puzzle)
+                except ValueError:
+                    future.set_result(INVALID_PUZZLE_MESSAGE)
+                else:
+                    await self.pending.acquire()
+                    self.games += 1
+                    self.queue.put_nowait((self.games, puzzle, future))
+
+                await responses.put(future)
+        except ConnectionError:
+            pass
+        else:
+            await responses.put(None)
+            await sender
+        finally:
+            sender.cancel()
+            writer.close()
+            self.connections.discard(task)
+
+    async def send(self, responses, writer):
+        """Write the solution of each future of ``responses`` in order."""
+        connected = True
+
+        while True:
+            future = await responses.get()
+            if future is None:
+                break
+
+            output = await future
+            if not connected:
+                continue
 
-    def __str__(self):
-        game_repr = []
-        for line in self.matrix:
-            for position in line:
-                game_repr.append(str(position.value))
-                game_repr.append(' ')
-            game_repr[-1] = '\n'
-        return ''.join(game_repr)
+            try:
+                writer.write(output.encode('ascii'))
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+
+    async def dispatch(self):
+        """Send the queued puzzles to the workers in batches."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_delay
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(),
+                                                        timeout))
+                except asyncio.TimeoutError:
+                    break
 
-    def __repr__(self):
-        return str(self)
+            await self.batches.acquire()
+            asyncio.ensure_future(self.solve(batch))
 
-    def __iter__(self):
+    async def solve(self, batch):
+        loop = asyncio.get_running_loop()
+        tasks = [(game_id, puzzle, self.game_options, 'line')
+                 for game_id, puzzle, future in batch]
+
+        try:
+            outputs = await loop.run_in_executor(self.executor, solve_batch,
+                                                 tasks)
+        except Exception:
+            logging.exception('Failed to solve a batch of %s games',
+                              len(batch))
+            outputs = [INVALID_PUZZLE_MESSAGE] * len(batch)
+        finally:
+            self.batches.release()
+
+        for (game_id, puzzle, future), output in zip(batch, outputs):
+            future.set_result(output)
+            self.pending.release()
+
+
+def serve(options, game_options):
+    """Run a ``SolverServer`` with the command line ``options`` until
+    interrupted."""
+    path = options.socket
+    if path is not None and os.path.exists(path):
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise ValueError('%s exists and is not a socket' % path)
+        os.remove(path)
+
+    server = SolverServer(game_options, max(options.jobs, 1),
+                          options.batch_size, options.batch_delay,
+                          options.max_pending)
+
+    async def run():
+        stopped = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM,
+                                                      stopped.set)
+
+        await server.start(path, options.host, options.port)
+        try:
+            await stopped.wait()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+    return 0
+
+
+class SolverClient(object):
+    """Sends puzzles to a ``SolverServer``.
+
+    ``address`` is the path of its Unix socket or a (host, port) tuple.
+
+    """
+
+    def __init__(self, address, timeout=None):
+        if isinstance(address, tuple):
+            family = socket.AF_INET
+        else:
+            family = socket.AF_UNIX
+
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(address)
+        self.file_obj = self.socket.makefile('rwb')
+
+    def solve(self, puzzle):
+        """Return the line sent back for ``puzzle``."""
+        return next(self.solve_many([puzzle]))
+
+    def solve_many(self, puzzles, window=SERVE_BATCHSIZE * 4):
+        """Yield the line sent back for each of ``puzzles``, in order.
+
+        Up to ``window`` puzzles are sent before reading their lines,
+        so the server can batch them.
+
+        """
+        sent = received = 0
+
+        for puzzle in puzzles:
+            self.file_obj.write(puzzle.encode('ascii') + b'\n')
+            sent += 1
+            if sent - received >= window:
+                self.file_obj.flush()
+                yield self._receive()
+                received += 1
+
+        self.file_obj.flush()
+        while received < sent:
+            yield self._receive()
+            received += 1
+
+    def _receive(self):
+        line = self.file_obj.readline()
+        if not line:
+            raise ConnectionError('Connection closed by the server')
+        return line.decode('ascii').rstrip('\n')
+
+    def close(self):
+        self.file_obj.close()
+        self.socket.close()
+
+    def __enter__(self):
         return self
 
-    def is_valid(self):
-        logging.info('Game #%s', self.id)
+    def __exit__(self, *exc_info):
+        self.close()
 
-        for line in self.matrix:
-            # Check for zeros
-            if 0 in line:
-                logging.info('Invalid Solution (zeros)')
-                logging.debug('\n%s', self)
-                return False
 
-            # Check lines
-            line_set = {pos.value for pos in line}
-            if len(line_set) != 9:
-                logging.info('Invalid Solution (line)')
-                logging.debug('\n%s', self)
-                return False
+#: Set in portfolio worker processes, see ``solve_portfolio``.
+PORTFOLIO_CANCEL = None
 
-        transp_matrix = zip(*self.matrix)
 
-        for column in transp_matrix:
-            # Check column
-            column_set = {pos.value for pos in column}
-            if len(column_set) != 9:
-                logging.info('Invalid Solution (column)')
-                logging.debug('\n%s', self)
-                return False
+def _init_portfolio(cancel):
+    global PORTFOLIO_CANCEL
+    PORTFOLIO_CANCEL = cancel
 
-        region_starts = itertools.combinations_with_replacement([0, 3, 6], 2)
-        for i, j in region_starts:
-            target_position = self.matrix[i][j]
-            region_set = {target_position.value}
 
-            for position in target_position.region:
-                region_set.add(position.value)
+def solve_member(task):
+    """Search a game in a portfolio worker process.
 
-            if len(region_set) != 9:
-                logging.info('Invalid Solution (region)')
-                logging.debug('\n%s', self)
-                return False
+    ``task`` is like the ones of ``solve_puzzle``, with the seed of the
+    search as fifth item. Returns the game id, the text to be printed
+    for it, or ``None`` if the search was cancelled, and its
+    ``GameStats``.
 
-        logging.info('Valid Solution')
-        return True
+    """
+    game_id, puzzle, kwargs, puzzle_format, seed = task
+    game = Game.from_string(puzzle, seed=seed, cancel=PORTFOLIO_CANCEL,
+                            **kwargs)
+    game.id = game_id
 
+    try:
+        output = solve_game(game, puzzle_format)
+    except SearchCancelled:
+        output = None
+    return game_id, output, game.stats
 
-def parse_input(forward_check=None, mrv=False, max_attempts=0,
-                file_obj=sys.stdin):
-    games = []
 
-    count = 0
-    matrix = []
+def solve_portfolio(tasks, members, seed=0):
+    """Solve ``tasks`` (see ``solve_puzzle``) racing ``members``
+    searches of each one.
 
-    for str_line in file_obj:
-        str_line = str_line.strip()
+    Each search runs on its own process with a different seed, from
+    ``seed`` on. Once one solves the game, or finds it has no
+    solution, the others are cancelled. Yields the results of the
+    winner, like ``solve_parallel``, in the same order as ``tasks``.
 
-        if not str_line or ' ' not in str_line:
-            continue
+    """
+    cancel = multiprocessing.Event()
+    pool = multiprocessing.Pool(members, _init_portfolio, (cancel,))
+
+    try:
+        for task in tasks:
+            cancel.clear()
+            results = queue.Queue()
+            for member in range(members):
+                pool.apply_async(solve_member, (task[:4] + (seed + member,),),
+                                 callback=results.put,
+                                 error_callback=results.put)
+
+            winner = gave_up = None
+            for member in range(members):
+                result = results.get()
+                if isinstance(result, BaseException):
+                    cancel.set()
+                    raise result
+
+                game_id, output, stats = result
+                if winner is None and stats.status in ('solved', 'unsolved'):
+                    winner = result
+                    cancel.set()
+                elif output is not None:
+                    gave_up = result
+
+            # If every search gave up, yield the message of one of them
+            yield winner or gave_up
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def split_puzzle(puzzle, game_options):
+    """Split the search of ``puzzle`` (see ``Game.to_string``) into
+    branches.
+
+    A game is created with ``game_options`` and propagated, if enabled.
+    Returns a puzzle for each value left to its empty position with
+    fewest possibilities, none if propagation found it has no solution,
+    or ``None`` if it has no empty positions.
 
-        line = str_line.split(' ')
-        matrix.append(line)
-        count += 1
+    """
+    game = Game.from_string(puzzle, **game_options)
+    if game.conflicting_givens or not game.constraint_propagation():
+        return []
 
-        if count == 9:
-            game = Game(matrix, forward_check=forward_check, mrv=mrv,
-                        max_attempts=max_attempts)
-            games.append(game)
-            matrix = []
-            count = 0
+    empty = [position for position in game.positions if not position.value]
+    if not empty:
+        return None
+
+    position = min(empty, key=lambda position: len(position.possibilities))
+    puzzle = game.to_string()
+    index = position.index
+    return [puzzle[:index] + VALUE_CHARS[value] + puzzle[index + 1:]
+            for value in sorted(position.possibilities.available)]
+
+
+def solve_branch(task):
+    """Search a branch of ``Game.solve_split`` in a worker process.
+
+    ``task`` is a tuple with the puzzle of the branch and the keyword
+    arguments of its game. Returns the status of the search, the
+    solution (for ``solved``) or the branches it was split into (for
+    ``split``, after ``SPLIT_BUDGET`` attempts), and the attempts made.
 
-    return games
+    """
+    puzzle, kwargs = task
+    givens = sum(char not in '0.' for char in puzzle)
+    game = Game.from_string(puzzle, cancel=PORTFOLIO_CANCEL,
+                            max_attempts=givens + SPLIT_BUDGET, **kwargs)
+
+    try:
+        game.solve()
+    except MaxAttemptsExceeded:
+        return ('split', split_puzzle(puzzle, kwargs) or [],
+                game.attempts_count - givens)
+    except TimeLimitExceeded:
+        return 'timeout', None, game.attempts_count - givens
+    except SearchCancelled:
+        return 'cancelled', None, game.attempts_count - givens
+
+    solution = game.to_string() if game.stats.status == 'solved' else None
+    return game.stats.status, solution, game.attempts_count - givens
+
+
+def percentile(values, percent):
+    """Return the nearest-rank ``percent`` percentile of sorted ``values``."""
+    if not values:
+        return 0.0
+    rank = max(int(math.ceil(percent / 100.0 * len(values))), 1)
+    return values[rank - 1]
+
+
+class StatsWriter(object):
+    """Collect the ``GameStats`` of a batch of games.
+
+    Each one is written to ``file_obj``, if given, as a line of JSON.
+    The latency of every game is kept for ``print_summary``, along with
+    the hit rate of ``cache`` if given. Puzzles read through ``timed``
+    get the time taken to read them as parse time.
+
+    """
+
+    def __init__(self, file_obj=None, cache=None):
+        self.file_obj = file_obj
+        self.cache = cache
+        self.latencies = []
+        self.parse_times = {}
+
+    def timed(self, puzzles):
+        """Yield ``puzzles``, timing how long each one takes to read."""
+        puzzles = iter(puzzles)
+        for game_id in itertools.count(1):
+            start = time.time()
+            try:
+                puzzle = next(puzzles)
+            except StopIteration:
+                return
+            self.parse_times[game_id] = time.time() - start
+            yield puzzle
+
+    def add(self, game_id, stats):
+        stats.times['parse'] = self.parse_times.pop(game_id, 0.0)
+        self.latencies.append(stats.latency)
+        if self.file_obj is not None:
+            self.file_obj.write(json.dumps(stats.to_dict(game_id),
+                                           sort_keys=True) + '\n')
+
+    def print_summary(self, stream=sys.stderr):
+        latencies = sorted(self.latencies)
+        stream.write('Latency of %s games: p50 %.4f, p95 %.4f, p99 %.4f, '
+                     'max %.4f seconds\n' % (
+                         len(latencies), percentile(latencies, 50),
+                         percentile(latencies, 95), percentile(latencies, 99),
+                         latencies[-1] if latencies else 0.0))
+
+        if self.cache is not None:
+            stream.write('Cache: %s hits, %s misses (%.1f%% hit rate)\n' % (
+                self.cache.hits, self.cache.misses,
+                self.cache.hit_rate * 100))
+
+
+def optional_int(option, opt_str, value, parser, default):
+    """Callback of options taking an optional integer argument."""
+    if parser.rargs and parser.rargs[0].isdigit():
+        value = int(parser.rargs.pop(0))
+    else:
+        value = default
+    setattr(parser.values, option.dest, value)
 
 
 def parse_options():
-    optparser = OptionParser()
+    optparser = OptionParser(usage=(
+        '%prog [options] < GAMES\n'
+        '       %prog [options] serve (--socket PATH | --port PORT)'))
 
     optparser.add_option("-v", "--verbose", dest="verbose", default=False,
                          action="store_true", help="Verbose output")
     optparser.add_option("-d", "--debug", dest="debug", default=False,
                          action="store_true", help="Print debug information")
+    optparser.add_option("--count-events", dest="count_events",
+                         default=False, action="store_true",
+                         help=("Print how many search events (assignments, "
+                               "backtracks, prunings...) each game had"))
     optparser.add_option("--forward-check", dest="forward_check",
                          default=False, action="store_true",
                          help="Enable forward check heuristic")
     optparser.add_option("--mrv", dest="mrv",
                          default=False, action="store_true",
                          help="Enable minimal remaining values heuristic")
+    optparser.add_option("--propagate", dest="propagate",
+                         default=False, action="store_true",
+                         help="Enable constraint propagation (naked and "
+                              "hidden singles)")
+    optparser.add_option("--locked-candidates", dest="locked_candidates",
+                         default=False, action="store_true",
+                         help="Also propagate locked candidates (implies "
+                              "--propagate)")
+    optparser.add_option("--backjump", dest="backjump",
+                         default=False, action="store_true",
+                         help=("Go back to the move responsible for a "
+                               "failure instead of the last one "
+                               "(conflict-directed backjumping)"))
+    optparser.add_option("--value-order", dest="value_order",
+                         default="lowest", type="choice",
+                         choices=sorted(VALUE_ORDERS),
+                         help=("Order in which values are tried: lowest, lcv "
+                               "(least constraining value first) or random. "
+                               "Defaults to lowest"))
+    optparser.add_option("--seed", dest="seed", default=None, type="int",
+                         help="Seed of --value-order random")
+    optparser.add_option("--restarts", dest="restarts", default=None,
+                         type="choice", choices=["luby", "geometric"],
+                         help=("Start the search over after a number of "
+                               "attempts growing with the luby or geometric "
+                               "policy. Requires --value-order random"))
+    optparser.add_option("--restart-unit", dest="restart_unit",
+                         default=RESTART_UNIT, type="int",
+                         help=("Attempts before the first restart. Defaults "
+                               "to %s" % RESTART_UNIT))
+    optparser.add_option("--portfolio", dest="portfolio", default=1,
+                         type="int", metavar="N",
+                         help=("Race N searches of each game with different "
+                               "seeds on N processes, taking the first one "
+                               "to finish. Implies --value-order random"))
+    optparser.add_option("--engine", dest="engine", default="backtrack",
+                         type="choice", choices=["backtrack", "dlx", "numpy"],
+                         help=("Search engine: backtrack, dlx (Dancing "
+                               "Links) or numpy (propagates batches of games "
+                               "with NumPy, searching the unsolved ones with "
+                               "backtrack). Defaults to backtrack"))
+    optparser.add_option("-j", "--jobs", dest="jobs", default=1, type="int",
+                         help="Solve games using JOBS processes")
+    optparser.add_option("--unordered", dest="unordered",
+                         default=False, action="store_true",
+                         help=("With --jobs, print games as soon as they are "
+                               "solved instead of in input order"))
+    optparser.add_option("--all-solutions", dest="all_solutions",
+                         default=False, action="store_true",
+                         help=("Print every solution of each game as soon "
+                               "as it is found, then their number"))
+    optparser.add_option("--split-jobs", dest="split_jobs", default=1,
+                         type="int", metavar="N",
+                         help=("Search each game on N processes, splitting "
+                               "the top of its search tree into branches"))
+    optparser.add_option("--interleave", dest="interleave",
+                         default=False, action="store_true",
+                         help=("Search many games at once, a slice of "
+                               "attempts each in turn, printing games as "
+                               "soon as they are solved"))
+    optparser.add_option("--slice-size", dest="slice_size",
+                         default=SLICE_SIZE, type="int",
+                         help=("Attempts of each slice of --interleave. "
+                               "Defaults to %s" % SLICE_SIZE))
+    optparser.add_option("--in-flight", dest="in_flight",
+                         default=SCHEDULE_IN_FLIGHT, type="int",
+                         help=("Games searched at once by --interleave. "
+                               "Defaults to %s" % SCHEDULE_IN_FLIGHT))
+    optparser.add_option("--demote-after", dest="demote_after", default=0,
+                         type="int", metavar="ATTEMPTS",
+                         help=("With --interleave, give games past "
+                               "ATTEMPTS a slice only every %s turns. "
+                               "Disabled by default" % LOW_LANE_INTERVAL))
+    optparser.add_option("--format", dest="format", default=None,
+                         type="choice", choices=["grid", "line"],
+                         help=("Input and output format: grid (nine lines "
+                               "per game) or line (81 values per line). "
+                               "Detected from the input by default"))
+    optparser.add_option("--box-size", dest="box_size", default=None,
+                         type="int",
+                         help=("Size of the regions of the games: 3 for 9x9 "
+                               "games, 4 for 16x16 and 5 for 25x25. "
+                               "Detected from the input by default"))
+    optparser.add_option("--stats-json", dest="stats_json", default=None,
+                         metavar="FILE",
+                         help=("Write the statistics of each game to FILE, "
+                               "one JSON record per line, and print the "
+                               "latency percentiles of the batch"))
+    optparser.add_option("--count-solutions", dest="count_solutions",
+                         default=None, action="callback",
+                         callback=optional_int, callback_args=(2,),
+                         metavar="[LIMIT]",
+                         help=("Print how many solutions each game has, "
+                               "stopping at LIMIT (2 by default, 0 for no "
+                               "limit), instead of solving it"))
+    optparser.add_option("--cache", dest="cache", default=False,
+                         action="store_true",
+                         help=("Reuse the solution of puzzles already solved, "
+                               "even if transposed, permuted or relabeled"))
+    optparser.add_option("--cache-size", dest="cache_size",
+                         default=CACHE_SIZE, type="int",
+                         help=("Puzzles kept in memory by --cache. Defaults "
+                               "to %s" % CACHE_SIZE))
+    optparser.add_option("--cache-file", dest="cache_file", default=None,
+                         metavar="FILE",
+                         help=("Also keep the solutions of --cache in a "
+                               "SQLite database in FILE (implies --cache)"))
     optparser.add_option("--validate", dest="validade",
                          default=False, action="store_true",
-                         help="Check game results")
+                         help=("Check that the games read are valid "
+                               "solutions, printing the invalid ones and "
+                               "why"))
+    optparser.add_option("--time-limit", dest="time_limit", default=0,
+                         type="float", metavar="SECONDS",
+                         help=("Give up a game after searching it for "
+                               "SECONDS. Disabled by default"))
+    optparser.add_option("--deadline", dest="deadline", default=0,
+                         type="float", metavar="SECONDS",
+                         help=("Give up every game still being searched "
+                               "SECONDS after the start. Disabled by "
+                               "default"))
     optparser.add_option("--max-attempts", dest="max_attempts",
                          default=10**6, type="int",
                          help=("Abort execution if exceeds MAX_ATTEMPTS. "
                                "Set to 0 to disable this check. "
                                "Defaults to 10^6"))
-
-    return optparser.parse_args()[0]
+    optparser.add_option("--socket", dest="socket", default=None,
+                         metavar="PATH",
+                         help="With serve, listen on a Unix socket at PATH")
+    optparser.add_option("--host", dest="host", default="127.0.0.1",
+                         help=("With serve and --port, address to listen "
+                               "on. Defaults to 127.0.0.1"))
+    optparser.add_option("--port", dest="port", default=None, type="int",
+                         help="With serve, listen on TCP port PORT")
+    optparser.add_option("--batch-size", dest="batch_size",
+                         default=SERVE_BATCHSIZE, type="int",
+                         help=("With serve, games sent at once to a worker. "
+                               "Defaults to %s" % SERVE_BATCHSIZE))
+    optparser.add_option("--batch-delay", dest="batch_delay",
+                         default=SERVE_BATCH_DELAY, type="float",
+                         metavar="SECONDS",
+                         help=("With serve, time waited for a batch to "
+                               "fill. Defaults to %s" % SERVE_BATCH_DELAY))
+    optparser.add_option("--max-pending", dest="max_pending",
+                         default=SERVE_MAX_PENDING, type="int",
+                         help=("With serve, games taken before waiting for "
+                               "some to be solved. Defaults to %s" %
+                               SERVE_MAX_PENDING))
+
+    options, args = optparser.parse_args()
+    options.serve = args == ['serve']
+
+    if args and not options.serve:
+        optparser.error('Unknown command %s' % ' '.join(args))
+    if options.portfolio > 1:
+        if (options.jobs > 1 or options.engine != 'backtrack' or
+                options.count_solutions is not None):
+            optparser.error('--portfolio requires the backtrack engine, '
+                            'a single job and no --count-solutions')
+        options.value_order = 'random'
+    if options.interleave and (options.jobs > 1 or options.portfolio > 1 or
+                               options.engine == 'numpy' or
+                               options.count_solutions is not None or
+                               options.count_events):
+        optparser.error('--interleave requires a single job, no '
+                        '--portfolio, --count-solutions or --count-events '
+                        'and the backtrack or dlx engine')
+    if options.split_jobs > 1 and (
+            options.jobs > 1 or options.portfolio > 1 or
+            options.interleave or options.engine != 'backtrack' or
+            options.count_solutions is not None):
+        optparser.error('--split-jobs requires the backtrack engine, a '
+                        'single job and no --portfolio, --interleave or '
+                        '--count-solutions')
+    if options.all_solutions and (
+            options.jobs > 1 or options.portfolio > 1 or
+            options.interleave or options.split_jobs > 1 or
+            options.engine == 'numpy' or
+            options.count_solutions is not None):
+        optparser.error('--all-solutions requires a single job, no '
+                        '--portfolio, --interleave, --split-jobs or '
+                        '--count-solutions and the backtrack or dlx '
+                        'engine')
+    if options.restarts and options.value_order != 'random':
+        optparser.error('--restarts requires --value-order random')
+    if options.serve and options.socket is None and options.port is None:
+        optparser.error('serve requires --socket or --port')
+
+    return options
 
 
 def configure_logging(options):
-    if options.verbose:
+    if options.verbose or options.count_events:
         logging.root.setLevel(logging.INFO)
 
     if options.debug:
@@ -436,27 +3916,149 @@ def configure_logging(options):
 
 
 def main():
+    start = time.time()
     options = parse_options()
     configure_logging(options)
 
-    games = parse_input(options.forward_check, options.mrv,
-                        options.max_attempts)
-    status = 0
+    game_options = {
+        'forward_check': options.forward_check,
+        'mrv': options.mrv,
+        'max_attempts': options.max_attempts,
+        'propagate': options.propagate,
+        'locked_candidates': options.locked_candidates,
+        'backjump': options.backjump,
+        'value_order': options.value_order,
+        'seed': options.seed,
+        'restarts': options.restarts,
+        'restart_unit': options.restart_unit,
+        'split_jobs': options.split_jobs,
+        'engine': options.engine,
+        'time_limit': options.time_limit,
+        'deadline': start + options.deadline if options.deadline else None,
+        'box_size': options.box_size,
+    }
+    if options.debug:
+        game_options['tracer'] = DebugTracer()
+    elif options.count_events:
+        game_options['tracer'] = CountingTracer()
+
+    if options.serve:
+        # A deadline from the start makes no sense for a long running
+        # server, but the time limit of each game does
+        game_options['deadline'] = None
+        return serve(options, game_options)
+
+    puzzle_format, puzzles = open_puzzles(sys.stdin, options.format,
+                                          options.box_size,
+                                          not options.validade)
+    writer = OutputWriter()
+
+    if options.validade:
+        games = invalid = 0
+        for game_id, reason in validate_puzzles(puzzles):
+            games += 1
+            if reason is not None:
+                invalid += 1
+                writer.write('Game #%s: %s\n' % (game_id, reason))
+        writer.write('%s of %s games are invalid\n' % (invalid, games))
+        writer.flush()
+        return 1 if invalid else 0
+
+    count_limit = options.count_solutions
+    separator = '\n' if puzzle_format == 'grid' else ''
+    if count_limit is not None:
+        separator = ''
+
+    cache = None
+    if ((options.cache or options.cache_file) and count_limit is None and
+            not options.all_solutions):
+        cache = SolutionCache(options.cache_size, options.cache_file)
+
+    stats = None
+    if options.verbose or options.stats_json:
+        stats_file = None
+        if options.stats_json:
+            stats_file = open(options.stats_json, 'w')
+        stats = StatsWriter(stats_file, cache)
+        puzzles = stats.timed(puzzles)
+
+    if (options.engine == 'numpy' or options.jobs > 1 or
+            options.portfolio > 1 or options.interleave):
+        if options.engine == 'numpy':
+            game_options['engine'] = 'backtrack'
+        elif options.portfolio > 1:
+            game_options.pop('seed')
+
+        def solve(puzzles):
+            tasks = ((i + 1, puzzle, game_options, puzzle_format,
+                      count_limit) for i, puzzle in enumerate(puzzles))
+
+            if options.engine == 'numpy':
+                return solve_batches(puzzles, game_options, puzzle_format,
+                                     count_limit)
+            elif options.interleave:
+                return solve_interleaved(
+                    puzzles, game_options, puzzle_format, options.slice_size,
+                    options.in_flight, options.demote_after)
+            elif options.portfolio > 1:
+                return solve_portfolio(tasks, options.portfolio,
+                                       options.seed or 0)
+            else:
+                return solve_parallel(tasks, options.jobs,
+                                      not options.unordered)
 
-    for i, game in enumerate(games):
-        game.id = i + 1
-        if options.validade:
-            if not game.is_valid():
-                status = 1
+        if cache is not None:
+            results = solve_cached(cache, puzzles, solve, puzzle_format)
         else:
-            try:
-                game.solve()
-            except MaxAttemptsExceeded:
-                pass
+            results = solve(puzzles)
+
+        for game_id, output, game_stats in results:
+            writer.write(output + separator)
+            if stats is not None:
+                stats.add(game_id, game_stats)
+
+    else:
+        if cache is not None:
+            puzzles = cache.filter(puzzles)
+        else:
+            puzzles = ((puzzle, None) for puzzle in puzzles)
+
+        game = None
+        for game_id, (puzzle, solution) in enumerate(puzzles, 1):
+            if solution is not None:
+                output, game_stats = cached_result(solution, puzzle_format)
+                writer.write(output + separator)
+                if stats is not None:
+                    stats.add(game_id, game_stats)
+                continue
+
+            if game is not None and len(puzzle) == game.board.cells:
+                game.reset(puzzle)
             else:
-                print(game)
+                game = Game.from_string(puzzle, **game_options)
+            game.id = game_id
+            if options.all_solutions:
+                for output in solve_all(game, puzzle_format):
+                    writer.write(output)
+            else:
+                output = solve_game(game, puzzle_format, count_limit)
+                writer.write(output + separator)
+            if cache is not None:
+                cache.store_output(game.id, output)
+            if stats is not None:
+                stats.add(game.id, game.stats)
+
+    writer.flush()
+
+    if stats is not None:
+        stats.print_summary()
+        if stats.file_obj is not None:
+            stats.file_obj.close()
+
+    if cache is not None:
+        cache.close()
 
-    return status
+    return 0
 
 
 if __name__ == '__main__':
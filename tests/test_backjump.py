@@ -0,0 +1,60 @@
+import unittest
+
+from sudoku import Game
+
+
+SOLUTION = ('417369825632158947958724316825437169791586432346912758'
+            '289643571573291684164875293')
+
+PUZZLE = ('400000805030000000000700000020000060000080400000010000'
+          '000603070500200000104000000')
+
+CONFIGS = [
+    {},
+    {'forward_check': True},
+    {'mrv': True},
+    {'mrv': True, 'forward_check': True},
+    {'mrv': True, 'forward_check': True, 'propagate': True},
+    {'mrv': True, 'forward_check': True, 'locked_candidates': True},
+]
+
+
+class TestBackjump(unittest.TestCase):
+
+    def test_solve(self):
+        for options in CONFIGS[2:]:
+            chronological = Game.from_string(PUZZLE, **options)
+            chronological.solve()
+
+            game = Game.from_string(PUZZLE, backjump=True, **options)
+            game.solve()
+            self.assertEqual(game.to_string(), SOLUTION)
+            self.assertLessEqual(game.attempts_count,
+                                 chronological.attempts_count, options)
+
+    def test_backjumps(self):
+        game = Game.from_string(PUZZLE, mrv=True, forward_check=True,
+                                backjump=True)
+        game.solve()
+        self.assertGreater(game.stats.backjumps, 0)
+        self.assertEqual(game.stats.to_dict()['backjumps'],
+                         game.stats.backjumps)
+        self.assertEqual(len(game.conflicts), len(game.last_moves))
+
+    def test_count_solutions(self):
+        for options in CONFIGS:
+            for givens, count in ((60, 8), (56, 42)):
+                game = Game.from_string(
+                    SOLUTION[:givens] + '0' * (81 - givens),
+                    backjump=True, **options)
+                self.assertEqual(game.count_solutions(0), count, options)
+
+    def test_unsolvable(self):
+        # [0][7] and [0][8] are left with 9 only, as 2 is on their columns
+        puzzle = list('1345678' + '0' * 74)
+        puzzle[3 * 9 + 8] = puzzle[6 * 9 + 7] = '2'
+        puzzle = ''.join(puzzle)
+        for options in CONFIGS[:4]:
+            game = Game.from_string(puzzle, backjump=True,
+                                    max_attempts=10**5, **options)
+            self.assertEqual(game.count_solutions(), 0, options)
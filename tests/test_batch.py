@@ -0,0 +1,42 @@
+import unittest
+
+from sudoku import Game, numpy, propagate_batch, solve_batches
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class TestPropagateBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.solution = ('417369825632158947958724316825437169791586432'
+                         '346912758289643571573291684164875293')
+        self.singles = ('0' + self.solution[1:40] + '0' * 5 +
+                        self.solution[45:])
+        self.hard = ('4.....8.5.3..........7......2.....6.....8.4......1.'
+                     '......6.3.7.5..2.....1.4......')
+
+    def test_propagate(self):
+        invalid = '11' + '0' * 79
+        propagated, solved = propagate_batch([self.singles, self.hard,
+                                              invalid])
+        self.assertEqual(solved, [True, None, False])
+        self.assertEqual(propagated[0], self.solution)
+        for given, value in zip(self.hard, propagated[1]):
+            if given != '.':
+                self.assertEqual(given, value)
+
+    def test_solve_batches(self):
+        outputs = [output for game_id, output, stats in solve_batches(
+            [self.singles, self.hard], {'engine': 'dlx'}, 'line')]
+        self.assertEqual(outputs[0], self.solution + '\n')
+        self.assertTrue(Game.from_string(outputs[1].strip()).is_valid())
+
+    def test_unsolvable(self):
+        invalid = '.' + self.solution[1:80] + '1'
+        results = list(solve_batches([invalid], {'engine': 'dlx'}))
+        game = Game.from_string(invalid)
+        game.solve()
+
+        # Printed as the search would, without searching it again
+        self.assertEqual(results[0][1], str(game))
+        self.assertEqual(results[0][2].status, 'unsolved')
+        self.assertEqual(results[0][2].attempts, 0)
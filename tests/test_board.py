@@ -0,0 +1,105 @@
+import io
+import unittest
+
+from sudoku import (BOARD, Board, Game, PEERS, VALUE_CHARS, box_size_for,
+                    open_puzzles, parse_input, puzzle_box_size)
+
+
+PUZZLE_16 = ('B281000F0030EC50A00400008021900090FGA0065EC0B2800057002009DG'
+             '0000DA0F3007100529G820G0D0A473E0CB00CB05089G4DA000763070C5B1'
+             'G0080A0FF43A600C05000GD95100090D0F0007CE80000A43007E500B67C0'
+             '0012D009F40A40E07C5B91800FAD08000D00E003750C0500020000FD06E0'
+             '00AD030007000002')
+
+
+def pattern_puzzle(box_size, blank):
+    """Return a valid grid of ``box_size`` with every ``blank``-th
+    position left blank."""
+    size = box_size * box_size
+    values = [(i // box_size + i % box_size * box_size + j) % size + 1
+              for i in range(size) for j in range(size)]
+    return ''.join('0' if index % blank == 0 else VALUE_CHARS[value]
+                   for index, value in enumerate(values))
+
+
+class TestBoard(unittest.TestCase):
+
+    def test_tables(self):
+        for box_size in range(2, 6):
+            board = Board.get(box_size)
+            size = box_size * box_size
+            self.assertEqual(board.size, size)
+            self.assertEqual(board.cells, size * size)
+            self.assertEqual(len(board.regions), size)
+            self.assertEqual(len(board.peers), size * size)
+            self.assertEqual(len(board.peers[0]),
+                             2 * (size - 1) + (box_size - 1) ** 2)
+            self.assertEqual(len(board.intersections), 2 * size * box_size)
+            self.assertEqual(board.bit_count[board.all_values], size)
+            self.assertEqual(board.lowest_value[board.all_values], 1)
+
+            for region in board.regions:
+                self.assertEqual(len({board.units[index][2]
+                                      for index in region}), 1)
+
+    def test_default(self):
+        self.assertIs(Board.get(3), BOARD)
+        self.assertIs(BOARD.peers, PEERS)
+
+    def test_invalid(self):
+        for box_size in (1, 6):
+            with self.assertRaises(ValueError):
+                Board.get(box_size)
+
+    def test_box_size(self):
+        self.assertEqual(box_size_for(9), 3)
+        self.assertEqual(box_size_for(25), 5)
+        self.assertIsNone(box_size_for(10))
+        self.assertEqual(puzzle_box_size(256), 4)
+        self.assertIsNone(puzzle_box_size(3))
+
+
+class TestLargeGames(unittest.TestCase):
+
+    def test_solve_16(self):
+        for options in ({'mrv': True, 'forward_check': True},
+                        {'mrv': True, 'propagate': True},
+                        {'engine': 'dlx'}):
+            game = Game.from_string(PUZZLE_16, **options)
+            self.assertIs(game.board, Board.get(4))
+            game.solve()
+            self.assertTrue(game.is_valid())
+            self.assertNotIn('0', game.to_string())
+
+    def test_solve_25(self):
+        puzzle = pattern_puzzle(5, 3)
+        game = Game.from_string(puzzle, mrv=True, forward_check=True)
+        game.solve()
+        self.assertTrue(game.is_valid())
+        self.assertEqual(len(str(game).split()), 625)
+
+    def test_box_size_mismatch(self):
+        with self.assertRaises(ValueError):
+            Game.from_string(PUZZLE_16, box_size=3)
+        with self.assertRaises(ValueError):
+            Game([[0] * 10] * 10)
+
+    def test_grid_numbers(self):
+        puzzle = pattern_puzzle(4, 5)
+        grid = u''.join(
+            ' '.join(str(VALUE_CHARS.index(char))
+                     for char in puzzle[start:start + 16]) + '\n'
+            for start in range(0, 256, 16))
+
+        puzzle_format, puzzles = open_puzzles(io.StringIO(grid))
+        self.assertEqual(puzzle_format, 'grid')
+        self.assertEqual(list(puzzles), [puzzle])
+
+    def test_parse_input(self):
+        games = parse_input(file_obj=io.StringIO(u'%s\n' % PUZZLE_16),
+                            box_size=4)
+        self.assertEqual(games[0].to_string(), PUZZLE_16)
+
+        with self.assertRaises(ValueError):
+            parse_input(file_obj=io.StringIO(u'%s\n' % PUZZLE_16),
+                        box_size=3)
@@ -0,0 +1,175 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from sudoku import (Game, GameStats, MAX_ATTEMPTS_MESSAGE, SolutionCache,
+                    apply_transform, cached_result, canonical_form,
+                    solve_cached)
+
+
+PUZZLE = ('400000805030000000000700000020000060000080400000010000'
+          '000603070500200000104000000')
+
+SOLUTION = ('417369825632158947958724316825437169791586432346912758'
+            '289643571573291684164875293')
+
+
+def shuffle(puzzle, rng):
+    """Return ``puzzle`` with random symmetries of the game applied."""
+    values = [int(value) for value in puzzle]
+    if rng.random() < 0.5:
+        values = [values[j * 9 + i] for i in range(9) for j in range(9)]
+
+    def order():
+        return [band * 3 + line for band in rng.sample(range(3), 3)
+                for line in rng.sample(range(3), 3)]
+
+    rows, columns = order(), order()
+    labels = [0] + rng.sample(range(1, 10), 9)
+    return ''.join(str(labels[values[i * 9 + j]])
+                   for i in rows for j in columns)
+
+
+def solve(puzzle):
+    game = Game.from_string(puzzle, mrv=True, forward_check=True)
+    game.solve()
+    return game.to_string()
+
+
+class TestCanonicalForm(unittest.TestCase):
+
+    def test_symmetries(self):
+        rng = random.Random(0)
+        form, transform = canonical_form(PUZZLE)
+
+        for i in range(20):
+            self.assertEqual(canonical_form(shuffle(PUZZLE, rng))[0], form)
+
+    def test_transform(self):
+        form, transform = canonical_form(PUZZLE)
+        self.assertEqual(apply_transform(transform, PUZZLE), form)
+        self.assertEqual(apply_transform(transform, form, inverse=True),
+                         PUZZLE)
+
+        solution = solve(PUZZLE)
+        canonical_solution = apply_transform(transform, solution)
+        self.assertEqual(solve(form), canonical_solution)
+        self.assertEqual(
+            apply_transform(transform, canonical_solution, inverse=True),
+            solution)
+
+    def test_blank_dots(self):
+        self.assertEqual(canonical_form(PUZZLE.replace('0', '.')),
+                         canonical_form(PUZZLE))
+
+
+class TestSolutionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.solution = solve(PUZZLE)
+
+    def test_lookup(self):
+        cache = SolutionCache()
+        self.assertIsNone(cache.lookup(PUZZLE))
+
+        cache.store(PUZZLE, self.solution)
+        self.assertEqual(cache.lookup(PUZZLE), self.solution)
+
+        variant = shuffle(PUZZLE, random.Random(1))
+        solution = cache.lookup(variant)
+        self.assertTrue(Game.from_string(solution).is_valid())
+        self.assertTrue(all(given in ('0', value)
+                            for given, value in zip(variant, solution)))
+
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        self.assertAlmostEqual(cache.hit_rate, 2 / 3.0)
+
+    def test_eviction(self):
+        cache = SolutionCache(size=2)
+        cache.store(PUZZLE, self.solution)
+        self.assertEqual(len(cache.entries), 2)
+
+        cache._put('a', 'b')
+        self.assertNotIn(PUZZLE, cache.entries)
+        self.assertEqual(cache.lookup(PUZZLE), self.solution)
+
+        cache._put('c', 'd')
+        cache._put('e', 'f')
+        self.assertIsNone(cache.lookup(PUZZLE))
+
+    def test_database(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'cache.db')
+
+        cache = SolutionCache(path=path)
+        cache.store(PUZZLE, self.solution)
+        cache.close()
+
+        cache = SolutionCache(path=path)
+        self.assertEqual(cache.lookup(PUZZLE), self.solution)
+        cache.close()
+
+    def test_filter(self):
+        cache = SolutionCache()
+        variant = shuffle(PUZZLE, random.Random(2))
+        puzzles = cache.filter([PUZZLE, variant, PUZZLE])
+
+        self.assertEqual(next(puzzles), (PUZZLE, None))
+        cache.store_output(1, str(Game.from_string(self.solution)))
+        puzzle, solution = next(puzzles)
+        self.assertEqual(puzzle, variant)
+        self.assertTrue(Game.from_string(solution).is_valid())
+        self.assertEqual(next(puzzles), (PUZZLE, self.solution))
+        self.assertEqual(cache.pending, {})
+
+    def test_store_output(self):
+        cache = SolutionCache()
+        list(cache.filter([PUZZLE, PUZZLE]))
+        cache.store_output(1, MAX_ATTEMPTS_MESSAGE)
+        cache.store_output(2, PUZZLE + '\n')
+        self.assertEqual(cache.entries, {})
+
+
+class TestSolveCached(unittest.TestCase):
+
+    def setUp(self):
+        self.solution = solve(PUZZLE)
+        self.cache = SolutionCache()
+        self.cache.store(PUZZLE, self.solution)
+        self.solved = []
+
+    def solve(self, puzzles):
+        for game_id, puzzle in enumerate(puzzles, 1):
+            self.solved.append(puzzle)
+            yield game_id, solve(puzzle) + '\n', GameStats()
+
+    def test_hits(self):
+        variant = shuffle(PUZZLE, random.Random(3))
+        results = list(solve_cached(self.cache, [PUZZLE, SOLUTION, PUZZLE],
+                                    self.solve, 'line'))
+
+        # Hits are written without searching a game
+        self.assertEqual(self.solved, [SOLUTION])
+        self.assertEqual([(game_id, output)
+                          for game_id, output, stats in results],
+                         [(1, self.solution + '\n'), (2, SOLUTION + '\n'),
+                          (3, self.solution + '\n')])
+        self.assertEqual([stats.status for game_id, output, stats in results],
+                         ['cached', None, 'cached'])
+        self.assertEqual(results[0][2].attempts, 0)
+        self.assertEqual(results[0][2].solutions, 1)
+
+        # Solutions of the misses are stored
+        results = list(solve_cached(self.cache, [SOLUTION, variant],
+                                    self.solve, 'line'))
+        self.assertEqual(self.solved, [SOLUTION])
+        self.assertEqual([stats.status for game_id, output, stats in results],
+                         ['cached', 'cached'])
+
+    def test_grid(self):
+        output, stats = cached_result(self.solution)
+        self.assertEqual(output, str(Game.from_string(self.solution)))
+        self.assertEqual(stats.status, 'cached')
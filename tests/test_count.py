@@ -0,0 +1,100 @@
+import unittest
+
+from sudoku import DancingLinks, Game, solve_game, solve_puzzle
+
+
+SOLUTION = ('417369825632158947958724316825437169791586432346912758'
+            '289643571573291684164875293')
+
+PUZZLE = ('400000805030000000000700000020000060000080400000010000'
+          '000603070500200000104000000')
+
+# The first 60 values of SOLUTION, which leave the grid with 8 solutions.
+MANY = SOLUTION[:60] + '0' * 21
+
+# The 1 in the last position repeats one of its column.
+UNSOLVABLE = SOLUTION[:60] + '0' * 20 + '1'
+
+CONFIGS = [
+    {},
+    {'mrv': True, 'forward_check': True},
+    {'mrv': True, 'forward_check': True, 'propagate': True},
+    {'mrv': True, 'forward_check': True, 'locked_candidates': True},
+    {'engine': 'dlx'},
+]
+
+
+class TestCountSolutions(unittest.TestCase):
+
+    def test_unique(self):
+        for options in CONFIGS[1:]:
+            game = Game.from_string(PUZZLE, **options)
+            self.assertEqual(game.count_solutions(), 1, options)
+            self.assertEqual(game.stats.solutions, 1)
+            self.assertEqual(game.stats.status, 'solved')
+
+    def test_many(self):
+        for options in CONFIGS:
+            game = Game.from_string(MANY, **options)
+            self.assertEqual(game.count_solutions(0), 8, options)
+
+    def test_limit(self):
+        for options in CONFIGS:
+            game = Game.from_string(MANY, **options)
+            self.assertEqual(game.count_solutions(), 2, options)
+            game = Game.from_string(MANY, **options)
+            self.assertEqual(game.count_solutions(5), 5, options)
+
+    def test_unsolvable(self):
+        for options in CONFIGS:
+            game = Game.from_string(UNSOLVABLE, **options)
+            self.assertEqual(game.count_solutions(), 0, options)
+            self.assertEqual(game.stats.status, 'unsolved')
+
+    def test_conflicting_givens(self):
+        # Two 3s on line 6, with the rest of the givens consistent
+        puzzle = ('408106500003000090002000100350090010049800300000000040'
+                  '330000080000600720004008035')
+        for options in CONFIGS:
+            game = Game.from_string(puzzle, **options)
+            self.assertTrue(game.conflicting_givens)
+            self.assertEqual(game.count_solutions(), 0, options)
+
+            game = Game.from_string(puzzle, **options)
+            game.solve()
+            self.assertEqual(game.stats.status, 'unsolved', options)
+
+    def test_no_candidates(self):
+        # Consistent givens, but [0][0] can't take any value
+        puzzle = ('017369825432158907958724316825437169791586432346912758'
+                  '289643571573291684164875293')
+        for options in CONFIGS:
+            game = Game.from_string(puzzle, **options)
+            self.assertFalse(game.conflicting_givens)
+            self.assertEqual(game.count_solutions(0), 0, options)
+
+    def test_solve_unsolvable(self):
+        game = Game.from_string(UNSOLVABLE, mrv=True, forward_check=True)
+        game.solve()
+        self.assertEqual(game.stats.status, 'unsolved')
+
+    def test_search(self):
+        game = Game.from_string(MANY, mrv=True, forward_check=True)
+        solutions = set(game.to_string() for solved in game.search())
+        self.assertEqual(len(solutions), 8)
+        self.assertIn(SOLUTION, solutions)
+
+    def test_dancing_links(self):
+        rows = [[0], [1, 2], [0, 1], [2]]
+        self.assertEqual(DancingLinks(3, rows).count(), 2)
+        self.assertEqual(DancingLinks(3, rows).count(1), 1)
+
+    def test_solve_game(self):
+        game = Game.from_string(MANY, mrv=True)
+        self.assertEqual(solve_game(game, count_limit=0), '8\n')
+
+    def test_solve_puzzle(self):
+        task = (3, MANY, {'engine': 'dlx'}, 'grid', 4)
+        game_id, output, stats = solve_puzzle(task)
+        self.assertEqual((game_id, output), (3, '4\n'))
+        self.assertEqual(stats.solutions, 4)
@@ -0,0 +1,48 @@
+import time
+import unittest
+
+from sudoku import DancingLinks, MaxAttemptsExceeded, TimeLimitExceeded
+
+
+class TestDancingLinks(unittest.TestCase):
+
+    def setUp(self):
+        # Example from Knuth's "Dancing Links" paper
+        self.rows = [
+            [2, 4, 5],
+            [0, 3, 6],
+            [1, 2, 5],
+            [0, 3],
+            [1, 6],
+            [3, 4, 6],
+        ]
+
+    def test_solve(self):
+        links = DancingLinks(7, self.rows)
+        self.assertEqual(sorted(links.solve()), [0, 3, 4])
+
+    def test_no_solution(self):
+        links = DancingLinks(7, self.rows[1:])
+        self.assertIsNone(links.solve())
+
+    def test_restores_links(self):
+        links = DancingLinks(7, self.rows[1:])
+        size = list(links.size)
+        links.solve()
+        self.assertEqual(links.size, size)
+        self.assertEqual(links.right[0], 1)
+
+    def test_max_visits(self):
+        links = DancingLinks(7, self.rows, max_visits=1)
+        with self.assertRaises(MaxAttemptsExceeded):
+            links.solve()
+        self.assertEqual(links.visits, 2)
+
+    def test_deadline(self):
+        links = DancingLinks(7, self.rows, deadline=time.time() - 1)
+        links.next_check = 1
+        with self.assertRaises(TimeLimitExceeded):
+            links.solve()
+
+        links = DancingLinks(7, self.rows, deadline=time.time() + 60)
+        self.assertEqual(sorted(links.solve()), [0, 3, 4])
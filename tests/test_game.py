@@ -1,8 +1,11 @@
 
 import io
+import time
 import unittest
 
-from sudoku import parse_input, Game
+from sudoku import (iter_games, parse_input, solve_parallel, solve_puzzle,
+                    Game, MaxAttemptsExceeded, MAX_ATTEMPTS_MESSAGE,
+                    TimeLimitExceeded, TIME_LIMIT_MESSAGE)
 
 
 class TestGame(unittest.TestCase):
@@ -176,8 +179,225 @@ class TestGame(unittest.TestCase):
         self.assertFalse(self.game.forward_checking(position, 1))
         self.assertTrue(self.game.forward_checking(position, 2))
 
+    def test_forward_checking_wipeout(self):
+        puzzle = ('400000805030000000000700000020000060000080400000010000'
+                  '000603070500200000104000000')
+        game = Game.from_string(puzzle, forward_check=True, mrv=True)
+        forward_checking = game.forward_checking
+        checks = []
+
+        def check(position, value):
+            expected = all(peer.value or
+                           peer.possibilities.mask & ~(1 << value)
+                           for peer in position.peers)
+            result = forward_checking(position, value)
+            self.assertEqual(result, expected)
+            checks.append(result)
+            return result
+
+        game.forward_checking = check
+        game.solve()
+        self.assertIn(False, checks)
+        self.assertEqual(game.stats.fc_rejections, checks.count(False))
+
     def test_forward_checking_disabled(self):
         self.game.forward_check = False
         position = self.game.matrix[0][0]
         self.assertTrue(self.game.forward_checking(position, 1))
         self.assertTrue(self.game.forward_checking(position, 2))
+
+    def test_propagation_solves_singles(self):
+        game_str = (u'0 1 7 3 6 9 8 2 5\n'
+                    '6 3 2 0 5 8 9 4 7\n'
+                    '9 5 8 7 2 4 3 1 6\n'
+                    '8 2 5 4 3 7 1 6 9\n'
+                    '7 9 1 5 8 0 4 3 2\n'
+                    '3 4 6 9 1 2 7 5 8\n'
+                    '2 8 9 6 4 3 5 7 1\n'
+                    '5 7 3 2 9 1 6 8 4\n'
+                    '1 6 4 8 7 5 2 9 3\n')
+        game = self.game_from_str(game_str)
+        game.propagate = True
+        game.solve()
+        self.assertTrue(game.is_valid())
+        self.assertEqual(game.last_moves, [])
+        self.assertEqual(game.propagated_count, 3)
+
+    def test_propagation_undo(self):
+        self.game.propagate = True
+        self.assertTrue(self.game.constraint_propagation())
+        self.assertEqual(self.game.matrix[8][0].value, 1)
+
+        available_moves = list(self.game.available_moves)
+        position = self.game.next()
+        position.value = 1
+        self.assertTrue(self.game.constraint_propagation(position))
+
+        self.game.undo_propagation(position)
+        position.value = 0
+        self.game.available_moves.push(self.game.last_moves.pop())
+        self.assertEqual(list(self.game.available_moves), available_moves)
+
+    def test_propagation_failure(self):
+        game_str = (u'0 0 0 0 0 0 0 0 0\n'
+                    '0 0 0 0 0 0 0 0 0\n'
+                    '0 0 0 0 0 0 0 0 0\n'
+                    '0 0 0 0 0 0 0 0 0\n'
+                    '0 0 0 0 0 0 0 0 0\n'
+                    '0 0 0 0 0 0 0 0 0\n'
+                    '0 0 0 0 0 0 0 0 0\n'
+                    '0 1 0 0 0 0 0 0 0\n'
+                    '0 2 3 4 5 6 7 8 9\n')
+        game = self.game_from_str(game_str)
+        game.propagate = True
+        available_moves = list(game.available_moves)
+        self.assertFalse(game.constraint_propagation())
+        self.assertEqual(list(game.available_moves), available_moves)
+        self.assertEqual(game.matrix[8][0].value, 0)
+
+    def test_locked_candidates(self):
+        matrix = [[0] * 9 for i in range(9)]
+        matrix[1][:3] = [2, 3, 4]
+        matrix[2][:3] = [5, 6, 7]
+        game = Game(matrix, propagate=True)
+        self.assertTrue(game.constraint_propagation())
+        self.assertIn(1, game.matrix[0][3].possibilities.available)
+
+        # 1, 8 and 9 are locked on the first line of the first region
+        game = Game(matrix, locked_candidates=True)
+        self.assertTrue(game.constraint_propagation())
+        for j in range(3, 9):
+            self.assertEqual(
+                game.matrix[0][j].possibilities.available & {1, 8, 9},
+                set())
+        self.assertEqual(game.matrix[0][0].possibilities.available,
+                         {1, 8, 9})
+
+    def test_solve_dlx(self):
+        game_str = (u'0 1 7 3 6 9 8 2 5\n'
+                    '0 0 0 0 5 8 9 4 7\n'
+                    '0 0 0 7 2 4 3 1 6\n'
+                    '0 0 0 4 3 7 1 6 9\n'
+                    '7 9 1 5 8 0 4 3 2\n'
+                    '3 4 6 9 1 2 7 5 8\n'
+                    '2 8 9 6 4 3 5 7 1\n'
+                    '5 7 3 2 9 1 6 8 4\n'
+                    '1 6 4 8 7 5 2 9 3\n')
+        game = self.game_from_str(game_str)
+        game.engine = 'dlx'
+        game.solve()
+        self.assertTrue(game.is_valid())
+        self.assertEqual(len(game.available_moves), 0)
+
+    def test_solve_dlx_max_attempts(self):
+        matrix = [[0] * 9 for i in range(9)]
+        game = Game(matrix, max_attempts=10, engine='dlx')
+        with self.assertRaises(MaxAttemptsExceeded):
+            game.solve()
+
+    def test_time_limit(self):
+        matrix = [[0] * 9 for i in range(9)]
+        matrix[0][0:3] = [1, 2, 3]
+        matrix[1][3:6] = [1, 2, 3]
+        # 1, 2 and 3 only fit the last region of line 2, where there are
+        # two positions left, which takes very long to find out
+        matrix[2][6] = 4
+
+        game = Game(matrix, time_limit=0.05)
+        start = time.time()
+        with self.assertRaises(TimeLimitExceeded):
+            game.solve()
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(game.stats.status, 'timeout')
+
+    def test_deadline(self):
+        game = Game([[0] * 9 for i in range(9)], deadline=time.time() - 1)
+        with self.assertRaises(TimeLimitExceeded):
+            game.solve()
+        self.assertEqual(game.attempts_count, 0)
+
+        game_id, output, stats = solve_puzzle(
+            (1, '0' * 81, {'deadline': time.time() - 1}, 'line'))
+        self.assertEqual(output, TIME_LIMIT_MESSAGE)
+
+    def test_to_string(self):
+        puzzle = '07' + '0' * 70 + '023456789'
+        self.assertEqual(self.game.to_string(), puzzle)
+        self.assertEqual(Game.from_string(puzzle).to_string(), puzzle)
+
+    def test_solve_puzzle(self):
+        puzzle = '07' + '0' * 70 + '023456789'
+        game_id, output, stats = solve_puzzle(
+            (3, puzzle, {'engine': 'dlx'}, 'grid'))
+        self.assertEqual(game_id, 3)
+        self.assertTrue(self.game_from_str(output).is_valid())
+        self.assertEqual(stats.status, 'solved')
+
+        game_id, output, stats = solve_puzzle(
+            (4, puzzle, {'max_attempts': 20}, 'grid'))
+        self.assertEqual(output, MAX_ATTEMPTS_MESSAGE)
+        self.assertEqual(stats.status, 'aborted')
+
+    def test_solve_parallel(self):
+        puzzle = '07' + '0' * 70 + '023456789'
+        tasks = [(i, puzzle, {'engine': 'dlx', 'max_attempts': i % 2 * 20},
+                  'grid')
+                 for i in range(6)]
+        results = list(solve_parallel(tasks, 2))
+        self.assertEqual([result[0] for result in results],
+                         list(range(6)))
+        self.assertEqual(results[1][1], MAX_ATTEMPTS_MESSAGE)
+        self.assertEqual(results[1][2].status, 'aborted')
+
+        results = solve_parallel(tasks, 2, ordered=False)
+        self.assertEqual(sorted(result[0] for result in results),
+                         list(range(6)))
+
+    def test_iter_games(self):
+        game_str = (u'2\n'
+                    '4 1 7 3 6 9 8 2 5\n'
+                    '6 3 2 1 5 8 9 4 7\n'
+                    '9 5 8 7 2 4 3 1 6\n'
+                    '8 2 5 4 3 7 1 6 9\n'
+                    '7 9 1 5 8 6 4 3 2\n'
+                    '3 4 6 9 1 2 7 5 8\n'
+                    '2 8 9 6 4 3 5 7 1\n'
+                    '5 7 3 2 9 1 6 8 4\n'
+                    '1 6 4 8 7 5 2 9 3\n'
+                    'invalid\n')
+        games = iter_games(file_obj=io.StringIO(game_str))
+        self.assertTrue(next(games).is_valid())
+
+        with self.assertRaises(ValueError):
+            next(games)
+
+    def test_reset(self):
+        puzzles = ['417369825632158947958724316825437169791586432346912758'
+                   '289643570000000000000000000',
+                   '400000805030000000000700000020000060000080400000010000'
+                   '000603070500200000104000000']
+        for options in ({'mrv': True}, {'mrv': True, 'forward_check': True},
+                        {'mrv': True, 'propagate': True, 'backjump': True},
+                        {'mrv': True, 'value_order': 'random', 'seed': 1}):
+            game = Game.from_string(puzzles[1], **options)
+            game.solve()
+            for puzzle in puzzles:
+                game.reset(puzzle)
+                self.assertEqual(game.to_string(), puzzle)
+                game.solve()
+
+                new_game = Game.from_string(puzzle, **options)
+                new_game.solve()
+                self.assertEqual(game.to_string(), new_game.to_string())
+                self.assertEqual(game.attempts_count,
+                                 new_game.attempts_count)
+                self.assertEqual(game.stats.nodes, new_game.stats.nodes)
+
+        with self.assertRaises(ValueError):
+            game.reset('0' * 16)
+
+    def test_slots(self):
+        position = self.game.matrix[0][0]
+        for obj in (position, position.possibilities):
+            with self.assertRaises(AttributeError):
+                obj.__dict__
@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+import unittest
+
+from sudoku import OutputWriter, open_puzzles, read_lines
+
+PUZZLE = ('4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5'
+          '..2.....1.4......')
+
+
+class TestOpenPuzzles(unittest.TestCase):
+
+    def setUp(self):
+        self.puzzle = PUZZLE.replace('.', '0')
+        self.grid = u''.join(
+            ' '.join(self.puzzle[start:start + 9]) + '\n'
+            for start in range(0, 81, 9))
+
+    def test_detect_grid(self):
+        puzzle_format, puzzles = open_puzzles(
+            io.StringIO(u'1\n' + self.grid))
+        self.assertEqual(puzzle_format, 'grid')
+        self.assertEqual(list(puzzles), [self.puzzle])
+
+    def test_detect_line(self):
+        puzzle_format, puzzles = open_puzzles(
+            io.StringIO(u'2\n%s\n\n%s\n' % (PUZZLE, self.puzzle)))
+        self.assertEqual(puzzle_format, 'line')
+        self.assertEqual([p.replace('.', '0') for p in puzzles],
+                         [self.puzzle] * 2)
+
+    def test_read_lines_invalid(self):
+        with self.assertRaises(ValueError):
+            list(read_lines(io.StringIO(u'%s\n123\n' % PUZZLE)))
+
+    def test_mapped_file(self):
+        for newline in ('\n', '\r\n'):
+            fd, path = tempfile.mkstemp()
+            self.addCleanup(os.remove, path)
+            with os.fdopen(fd, 'wb') as file_obj:
+                data = '3' + newline + (PUZZLE + newline) * 3
+                file_obj.write(data.encode('ascii'))
+
+            with open(path) as file_obj:
+                puzzle_format, puzzles = open_puzzles(file_obj)
+                self.assertEqual(puzzle_format, 'line')
+                self.assertEqual(list(puzzles), [self.puzzle] * 3)
+
+    def test_mapped_file_misaligned(self):
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'wb') as file_obj:
+            file_obj.write((PUZZLE + '\n' + PUZZLE + '0\n').encode('ascii'))
+
+        with open(path) as file_obj:
+            with self.assertRaises(ValueError):
+                list(open_puzzles(file_obj, 'line')[1])
+
+
+class TestOutputWriter(unittest.TestCase):
+
+    def test_write(self):
+        stream = io.StringIO()
+        writer = OutputWriter(stream, size=10, interval=60)
+        writer.write(u'12345')
+        self.assertEqual(stream.getvalue(), u'')
+        writer.write(u'67890')
+        self.assertEqual(stream.getvalue(), u'1234567890')
+        writer.write(u'1')
+        writer.flush()
+        self.assertEqual(stream.getvalue(), u'12345678901')
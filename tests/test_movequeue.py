@@ -0,0 +1,75 @@
+import random
+import unittest
+
+from sudoku import Game, MoveQueue, MRVQueue
+
+
+class TestMoveQueue(unittest.TestCase):
+
+    def setUp(self):
+        matrix = [[0] * 9 for i in range(9)]
+        matrix[0][:3] = [1, 2, 3]
+        self.game = Game(matrix)
+        self.queue = self.game.available_moves
+
+    def test_order(self):
+        self.assertIsInstance(self.queue, MoveQueue)
+        self.assertEqual(len(self.queue), 78)
+        self.assertEqual(self.queue.pop().coordinates, (0, 3))
+        self.assertEqual(self.queue.pop().coordinates, (0, 4))
+
+    def test_push_and_remove(self):
+        first = self.queue.pop()
+        self.queue.remove(self.game.matrix[0][4])
+        self.queue.push(self.game.matrix[0][4])
+        self.queue.push(first)
+        self.assertEqual(self.queue.pop(), first)
+        self.assertEqual(self.queue.pop().coordinates, (0, 4))
+
+
+class TestMRVQueue(unittest.TestCase):
+
+    def setUp(self):
+        matrix = [[0] * 9 for i in range(9)]
+        matrix[0] = [0, 1, 7, 3, 6, 9, 8, 2, 5]
+        matrix[4] = [7, 9, 1, 5, 8, 0, 4, 3, 2]
+        matrix[8] = [1, 6, 4, 8, 7, 5, 2, 9, 3]
+        self.game = Game(matrix, mrv=True)
+        self.queue = self.game.available_moves
+
+    def test_matches_stable_sort(self):
+        self.assertIsInstance(self.queue, MRVQueue)
+        reference = [position for position in self.game.positions
+                     if not position.value]
+        assigned = []
+        rng = random.Random(0)
+
+        for step in range(2000):
+            if assigned and (not reference or rng.random() < 0.4):
+                position = assigned.pop()
+                position.value = 0
+                self.queue.push(position)
+                reference.insert(0, position)
+                continue
+
+            reference.sort(key=lambda position: len(position.possibilities))
+            position = self.queue.pop()
+            self.assertIs(position, reference.pop(0))
+
+            available = position.possibilities.available
+            if available:
+                position.value = rng.choice(sorted(available))
+                assigned.append(position)
+            else:
+                self.queue.push(position)
+                reference.insert(0, position)
+
+            self.assertEqual(len(self.queue), len(reference))
+
+    def test_remove(self):
+        position = self.game.matrix[1][1]
+        self.queue.remove(position)
+        self.assertEqual(len(self.queue), 55)
+        popped = [self.queue.pop() for i in range(len(self.queue))]
+        self.assertNotIn(position, popped)
+        self.assertEqual(len(set(popped)), 55)
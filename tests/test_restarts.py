@@ -0,0 +1,93 @@
+import threading
+import unittest
+
+from sudoku import (Game, SearchCancelled, luby, restart_cutoff,
+                    solve_portfolio)
+
+
+SOLUTION = ('417369825632158947958724316825437169791586432346912758'
+            '289643571573291684164875293')
+
+PUZZLE = ('400000805030000000000700000020000060000080400000010000'
+          '000603070500200000104000000')
+
+
+class TestRestartPolicies(unittest.TestCase):
+
+    def test_luby(self):
+        self.assertEqual([luby(i) for i in range(1, 16)],
+                         [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8])
+
+    def test_restart_cutoff(self):
+        self.assertEqual([restart_cutoff('luby', i, 10) for i in range(7)],
+                         [10, 10, 20, 10, 10, 20, 40])
+        self.assertEqual([restart_cutoff('geometric', i, 100)
+                          for i in range(4)],
+                         [100, 150, 225, 337])
+
+
+class TestValueOrder(unittest.TestCase):
+
+    def test_solve(self):
+        for options in ({'value_order': 'lcv'},
+                        {'value_order': 'random', 'seed': 1},
+                        {'value_order': 'random', 'seed': 1,
+                         'restarts': 'luby', 'restart_unit': 10},
+                        {'value_order': 'random', 'seed': 2,
+                         'restarts': 'geometric', 'restart_unit': 10}):
+            game = Game.from_string(PUZZLE, mrv=True, forward_check=True,
+                                    **options)
+            game.solve()
+            self.assertEqual(game.to_string(), SOLUTION, options)
+
+    def test_random_seed(self):
+        attempts = []
+        for seed in (1, 1, 2):
+            game = Game.from_string(PUZZLE, mrv=True, forward_check=True,
+                                    value_order='random', seed=seed)
+            game.solve()
+            attempts.append(game.attempts_count)
+        self.assertEqual(attempts[0], attempts[1])
+
+    def test_restarts(self):
+        game = Game.from_string(PUZZLE, mrv=True, forward_check=True,
+                                value_order='random', seed=1,
+                                restarts='luby', restart_unit=10)
+        game.solve()
+        self.assertGreater(game.stats.restarts, 0)
+        self.assertEqual(game.stats.to_dict()['restarts'],
+                         game.stats.restarts)
+
+    def test_count_solutions(self):
+        puzzle = SOLUTION[:56] + '0' * 25
+        for options in ({'value_order': 'lcv'},
+                        {'value_order': 'random', 'seed': 3,
+                         'restarts': 'luby', 'restart_unit': 5}):
+            game = Game.from_string(puzzle, mrv=True, forward_check=True,
+                                    **options)
+            self.assertEqual(game.count_solutions(0), 42, options)
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        cancel.set()
+        game = Game.from_string(PUZZLE, mrv=True, cancel=cancel)
+        with self.assertRaises(SearchCancelled):
+            game.solve()
+        self.assertEqual(game.stats.status, 'cancelled')
+
+
+class TestPortfolio(unittest.TestCase):
+
+    def test_solve_portfolio(self):
+        options = {'mrv': True, 'forward_check': True,
+                   'value_order': 'random', 'restarts': 'luby'}
+        puzzles = [PUZZLE, SOLUTION[:60] + '0' * 21]
+        tasks = [(i + 1, puzzle, options, 'line')
+                 for i, puzzle in enumerate(puzzles)]
+
+        results = list(solve_portfolio(tasks, 3, seed=1))
+        self.assertEqual([game_id for game_id, output, stats in results],
+                         [1, 2])
+        self.assertEqual(results[0][1], SOLUTION + '\n')
+        for game_id, output, stats in results:
+            self.assertEqual(stats.status, 'solved')
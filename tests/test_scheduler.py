@@ -0,0 +1,82 @@
+import unittest
+
+from sudoku import (Game, MAX_ATTEMPTS_MESSAGE, MaxAttemptsExceeded,
+                    solve_interleaved)
+
+
+SOLUTION = ('417369825632158947958724316825437169791586432346912758'
+            '289643571573291684164875293')
+
+PUZZLE = ('400000805030000000000700000020000060000080400000010000'
+          '000603070500200000104000000')
+
+EASY = SOLUTION[:60] + '0' * 21
+
+
+class TestSolveSteps(unittest.TestCase):
+
+    def test_slices(self):
+        options = {'mrv': True, 'forward_check': True}
+        game = Game.from_string(PUZZLE, **options)
+        slices = sum(1 for step in game.solve_steps(100))
+
+        whole = Game.from_string(PUZZLE, **options)
+        whole.solve()
+
+        self.assertGreater(slices, 10)
+        self.assertEqual(game.to_string(), SOLUTION)
+        self.assertEqual(game.attempts_count, whole.attempts_count)
+        self.assertEqual(game.stats.status, 'solved')
+        self.assertGreater(game.stats.times['search'], 0)
+
+    def test_max_attempts(self):
+        game = Game.from_string(PUZZLE, mrv=True, max_attempts=500)
+        with self.assertRaises(MaxAttemptsExceeded):
+            for step in game.solve_steps(100):
+                pass
+
+    def test_dlx(self):
+        game = Game.from_string(PUZZLE, engine='dlx')
+        self.assertEqual(list(game.solve_steps(10)), [])
+        self.assertEqual(game.to_string(), SOLUTION)
+
+
+class TestSolveInterleaved(unittest.TestCase):
+
+    def test_easy_first(self):
+        options = {'mrv': True, 'forward_check': True}
+        results = list(solve_interleaved(
+            iter([PUZZLE] + [EASY] * 5), options, 'line', slice_size=100))
+
+        self.assertEqual([game_id for game_id, output, stats in results],
+                         [2, 3, 4, 5, 6, 1])
+        self.assertEqual(results[-1][1], SOLUTION + '\n')
+        for game_id, output, stats in results:
+            self.assertEqual(stats.status, 'solved')
+
+    def test_in_flight(self):
+        options = {'mrv': True, 'forward_check': True}
+        results = list(solve_interleaved(
+            iter([PUZZLE, PUZZLE, EASY]), options, 'line', slice_size=100,
+            in_flight=2))
+        self.assertEqual([game_id for game_id, output, stats in results],
+                         [1, 2, 3])
+
+    def test_demote(self):
+        options = {'mrv': True, 'forward_check': True}
+        puzzles = [PUZZLE, PUZZLE] + [EASY] * 4
+        results = list(solve_interleaved(
+            iter(puzzles), options, 'line', slice_size=100, in_flight=2,
+            demote_after=200))
+
+        # Demoted games leave room for the easy ones
+        self.assertEqual([game_id for game_id, output, stats in results],
+                         [3, 4, 5, 6, 1, 2])
+
+    def test_limits(self):
+        options = {'mrv': True, 'max_attempts': 300}
+        results = list(solve_interleaved(iter([PUZZLE, EASY]), options,
+                                         'line', slice_size=100))
+        self.assertEqual(results[0][0], 2)
+        self.assertEqual(results[1][1], MAX_ATTEMPTS_MESSAGE)
+        self.assertEqual(results[1][2].status, 'aborted')
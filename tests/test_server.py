@@ -0,0 +1,94 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from sudoku import (INVALID_PUZZLE_MESSAGE, SolverClient, SolverServer,
+                    check_puzzle)
+
+
+PUZZLE = ('400000805030000000000700000020000060000080400000010000'
+          '000603070500200000104000000')
+
+SOLUTION = ('417369825632158947958724316825437169791586432346912758'
+            '289643571573291684164875293')
+
+
+class ServerThread(threading.Thread):
+    """Runs a ``SolverServer`` on its own event loop."""
+
+    def __init__(self, server, **address):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.server = server
+        self.address = address
+        self.started = threading.Event()
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        self.stopped = asyncio.Event()
+        self.loop.run_until_complete(self.serve())
+        self.loop.close()
+
+    async def serve(self):
+        self.bound = await self.server.start(**self.address)
+        self.started.set()
+        await self.stopped.wait()
+        await self.server.close()
+
+    def __enter__(self):
+        self.start()
+        self.started.wait(30)
+        return self.bound
+
+    def __exit__(self, *exc_info):
+        self.loop.call_soon_threadsafe(self.stopped.set)
+        self.join(30)
+
+
+class TestSolverServer(unittest.TestCase):
+
+    def setUp(self):
+        self.options = {'mrv': True, 'forward_check': True,
+                        'max_attempts': 10**6}
+
+    def test_tcp(self):
+        server = SolverServer(self.options, jobs=2, batch_size=4)
+
+        with ServerThread(server, port=0) as address:
+            with SolverClient(address, timeout=60) as client:
+                self.assertEqual(client.solve(PUZZLE), SOLUTION)
+                outputs = list(client.solve_many(
+                    [PUZZLE, 'invalid', PUZZLE.replace('0', '.')] * 5,
+                    window=4))
+
+        self.assertEqual(outputs,
+                         [SOLUTION, INVALID_PUZZLE_MESSAGE.strip(),
+                          SOLUTION] * 5)
+        self.assertEqual(server.games, 11)
+
+    def test_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'sudoku.sock')
+
+        server = SolverServer(self.options, max_pending=2)
+        with ServerThread(server, path=path) as address:
+            clients = [SolverClient(address, timeout=60) for i in range(3)]
+            try:
+                results = [client.solve_many([PUZZLE] * 5)
+                           for client in clients]
+                for result in results:
+                    self.assertEqual(list(result), [SOLUTION] * 5)
+            finally:
+                for client in clients:
+                    client.close()
+
+    def test_check_puzzle(self):
+        check_puzzle(PUZZLE)
+        check_puzzle('0' * 256)
+        for puzzle in ('0' * 80, PUZZLE[:-1] + 'A', PUZZLE[:-1] + 'x'):
+            with self.assertRaises(ValueError):
+                check_puzzle(puzzle)
@@ -0,0 +1,67 @@
+import itertools
+import unittest
+
+from sudoku import (Game, MAX_ATTEMPTS_MESSAGE, check_solution, solve_all)
+
+
+SOLUTION = ('417369825632158947958724316825437169791586432346912758'
+            '289643571573291684164875293')
+
+# The first 60 values of SOLUTION, which leave the grid with 8 solutions.
+MANY = SOLUTION[:60] + '0' * 21
+
+CONFIGS = [
+    {},
+    {'mrv': True, 'forward_check': True},
+    {'mrv': True, 'forward_check': True, 'propagate': True},
+    {'mrv': True, 'backjump': True},
+    {'engine': 'dlx'},
+]
+
+
+class TestIterSolutions(unittest.TestCase):
+
+    def test_all(self):
+        for options in CONFIGS:
+            game = Game.from_string(MANY, **options)
+            solutions = list(game.iter_solutions())
+            self.assertEqual(len(solutions), 8, options)
+            self.assertEqual(len(set(solutions)), 8)
+            self.assertIn(SOLUTION, solutions)
+            for solution in solutions:
+                self.assertIsNone(check_solution(solution))
+                self.assertEqual(solution[:60], MANY[:60])
+            self.assertEqual(game.stats.solutions, 8)
+            self.assertEqual(game.stats.status, 'solved')
+
+    def test_lazy(self):
+        game = Game.from_string(SOLUTION[:45] + '0' * 36, mrv=True)
+        first = list(itertools.islice(game.iter_solutions(), 2))
+        self.assertEqual(len(first), 2)
+        self.assertEqual(game.to_string(), first[1])
+
+        # Going through every solution takes many more attempts
+        whole = Game.from_string(SOLUTION[:45] + '0' * 36, mrv=True)
+        self.assertGreater(sum(1 for solution in whole.iter_solutions()), 2)
+        self.assertGreater(whole.attempts_count, game.attempts_count * 2)
+
+    def test_unsolvable(self):
+        game = Game.from_string(SOLUTION[:60] + '0' * 20 + '1')
+        self.assertEqual(list(game.iter_solutions()), [])
+        self.assertEqual(game.stats.status, 'unsolved')
+
+    def test_solve_all(self):
+        game = Game.from_string(MANY, mrv=True)
+        outputs = list(solve_all(game, 'line'))
+        self.assertEqual(len(outputs), 9)
+        self.assertEqual(outputs[-1], '8\n')
+
+        game = Game.from_string(MANY, mrv=True)
+        outputs = list(solve_all(game, 'grid'))
+        self.assertTrue(outputs[0].endswith(' 3\n\n'))
+
+        game = Game.from_string(SOLUTION[:45] + '0' * 36, mrv=True,
+                                max_attempts=400)
+        outputs = list(solve_all(game, 'line'))
+        self.assertEqual(outputs[-1], MAX_ATTEMPTS_MESSAGE)
+        self.assertGreater(len(outputs), 1)
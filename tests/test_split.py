@@ -0,0 +1,71 @@
+import unittest
+
+import sudoku
+from sudoku import Game, MaxAttemptsExceeded, split_puzzle
+
+
+SOLUTION = ('417369825632158947958724316825437169791586432346912758'
+            '289643571573291684164875293')
+
+PUZZLE = ('400000805030000000000700000020000060000080400000010000'
+          '000603070500200000104000000')
+
+
+class TestSplitPuzzle(unittest.TestCase):
+
+    def test_split(self):
+        branches = split_puzzle(PUZZLE, {'mrv': True})
+        self.assertGreater(len(branches), 1)
+        index = [i for i, char in enumerate(branches[0])
+                 if char != PUZZLE[i]]
+        self.assertEqual(len(index), 1)
+        self.assertEqual({branch[:index[0]] + branch[index[0] + 1:]
+                          for branch in branches},
+                         {PUZZLE[:index[0]] + PUZZLE[index[0] + 1:]})
+        self.assertIn(SOLUTION[index[0]],
+                      [branch[index[0]] for branch in branches])
+
+    def test_solved(self):
+        self.assertIsNone(split_puzzle(SOLUTION, {}))
+        self.assertEqual(split_puzzle(SOLUTION[:80] + '0', {}),
+                         [SOLUTION])
+
+
+class TestSolveSplit(unittest.TestCase):
+
+    def test_solve(self):
+        game = Game.from_string(PUZZLE, mrv=True, forward_check=True,
+                                split_jobs=2)
+        game.solve()
+        self.assertEqual(game.to_string(), SOLUTION)
+        self.assertEqual(game.stats.status, 'solved')
+        self.assertEqual(len(game.available_moves), 0)
+        self.assertGreater(game.attempts_count, 81)
+
+    def test_resplit(self):
+        budget = sudoku.SPLIT_BUDGET
+        sudoku.SPLIT_BUDGET = 500
+        try:
+            game = Game.from_string(PUZZLE, mrv=True, split_jobs=2)
+            game.solve()
+        finally:
+            sudoku.SPLIT_BUDGET = budget
+
+        self.assertEqual(game.to_string(), SOLUTION)
+        self.assertGreater(game.stats.splits, 0)
+        self.assertEqual(game.stats.to_dict()['splits'], game.stats.splits)
+
+    def test_unsolvable(self):
+        # [0][7] and [0][8] are left with 9 only, as 2 is on their columns
+        puzzle = list('1345678' + '0' * 74)
+        puzzle[3 * 9 + 8] = puzzle[6 * 9 + 7] = '2'
+        game = Game.from_string(''.join(puzzle), mrv=True,
+                                forward_check=True, split_jobs=2)
+        game.solve()
+        self.assertEqual(game.stats.status, 'unsolved')
+
+    def test_max_attempts(self):
+        game = Game.from_string(PUZZLE, mrv=True, split_jobs=2,
+                                max_attempts=1000)
+        with self.assertRaises(MaxAttemptsExceeded):
+            game.solve()
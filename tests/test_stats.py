@@ -0,0 +1,95 @@
+import io
+import json
+import unittest
+
+from sudoku import (CountingTracer, Game, GameStats, StatsWriter, percentile,
+                    solve_game)
+
+
+PUZZLE = ('400000805030000000000700000020000060000080400000010000'
+          '000603070500200000104000000')
+
+
+class TestGameStats(unittest.TestCase):
+
+    def test_search(self):
+        tracer = CountingTracer()
+        counts = []
+        tracer.finish = lambda game: counts.append(dict(tracer.counts))
+
+        game = Game.from_string(PUZZLE, mrv=True, forward_check=True,
+                                tracer=tracer)
+        solve_game(game)
+        stats = game.stats
+        counts = counts[0]
+
+        self.assertEqual(stats.status, 'solved')
+        self.assertEqual(stats.attempts, game.attempts_count)
+        self.assertEqual(stats.nodes, counts['select'])
+        self.assertEqual(stats.backtracks, counts['backtrack'])
+        self.assertEqual(stats.fc_rejections, counts['prune'])
+        self.assertEqual(stats.max_depth, len(game.last_moves))
+        self.assertEqual(stats.propagated, 0)
+        self.assertGreater(stats.times['setup'], 0)
+        self.assertGreater(stats.times['search'], 0)
+        self.assertGreater(stats.times['output'], 0)
+        self.assertEqual(stats.times['parse'], 0)
+
+    def test_propagation(self):
+        game = Game.from_string(PUZZLE, mrv=True, propagate=True)
+        game.solve()
+        self.assertEqual(game.stats.propagated, game.propagated_count)
+        self.assertGreater(game.stats.propagated, 0)
+
+    def test_aborted(self):
+        game = Game.from_string(PUZZLE, max_attempts=100)
+        solve_game(game)
+        self.assertEqual(game.stats.status, 'aborted')
+        self.assertEqual(game.stats.attempts, 101)
+
+    def test_dlx(self):
+        game = Game.from_string(PUZZLE, engine='dlx')
+        game.solve()
+        self.assertEqual(game.stats.status, 'solved')
+        self.assertEqual(game.stats.nodes,
+                         game.attempts_count - 81 + PUZZLE.count('0'))
+        self.assertEqual(game.stats.max_depth, PUZZLE.count('0'))
+
+    def test_to_dict(self):
+        stats = GameStats()
+        stats.times['search'] = 1.5
+        stats.times['output'] = 0.5
+        record = stats.to_dict(7)
+        self.assertEqual(record['game'], 7)
+        self.assertEqual(record['latency'], 2.0)
+        self.assertEqual(sorted(record['times']), sorted(GameStats.PHASES))
+
+
+class TestStatsWriter(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 99), 3)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_write(self):
+        output = io.StringIO()
+        writer = StatsWriter(output)
+
+        for game_id, puzzle in enumerate(writer.timed([PUZZLE, PUZZLE]), 1):
+            game = Game.from_string(puzzle, mrv=True)
+            solve_game(game)
+            writer.add(game_id, game.stats)
+
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([record['game'] for record in records], [1, 2])
+        self.assertEqual(records[0]['status'], 'solved')
+        self.assertEqual(len(writer.latencies), 2)
+        self.assertEqual(writer.parse_times, {})
+
+        stream = io.StringIO()
+        writer.print_summary(stream)
+        self.assertIn('Latency of 2 games', stream.getvalue())
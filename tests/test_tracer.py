@@ -0,0 +1,81 @@
+import logging
+import unittest
+
+from sudoku import CountingTracer, DebugTracer, Game, Tracer
+
+
+PUZZLE = ('400000805030000000000700000020000060000080400000010000'
+          '000603070500200000104000000')
+
+
+class RecordingTracer(Tracer):
+
+    def __init__(self):
+        self.events = []
+
+    def select(self, game, source, position):
+        self.events.append(('select', source, position))
+
+    def backtrack(self, game, source, position):
+        self.events.append(('backtrack', source, position))
+
+    def finish(self, game):
+        self.events.append(('finish', game))
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_no_tracer(self):
+        game = Game.from_string(PUZZLE, mrv=True)
+        self.assertIsNone(game.tracer)
+        game.solve()
+        self.assertTrue(game.is_valid())
+
+    def test_events(self):
+        tracer = RecordingTracer()
+        game = Game.from_string(PUZZLE, mrv=True, forward_check=True,
+                                tracer=tracer)
+        game.solve()
+
+        self.assertEqual(tracer.events[-1], ('finish', game))
+        self.assertEqual(tracer.events[0][:2], ('select', None))
+
+        for event, source, position in tracer.events[:-1]:
+            if event == 'backtrack':
+                self.assertIsNot(source, position)
+
+    def test_counting(self):
+        tracer = CountingTracer()
+        game = Game.from_string(PUZZLE, mrv=True, forward_check=True,
+                                tracer=tracer)
+
+        counts = []
+        tracer.finish = lambda game: counts.append(dict(tracer.counts))
+        game.solve()
+
+        counts = counts[0]
+        self.assertEqual(counts['assign'], game.attempts_count)
+        self.assertEqual(counts['backtrack'], counts['unassign'])
+        self.assertEqual(counts['select'] - counts['backtrack'],
+                         len(game.last_moves))
+        self.assertGreater(counts['prune'], 0)
+        self.assertEqual(counts['infer'], 0)
+
+    def test_counting_reset(self):
+        tracer = CountingTracer()
+        game = Game.from_string(PUZZLE, mrv=True, tracer=tracer)
+        game.solve()
+        self.assertEqual(set(tracer.counts.values()), {0})
+
+    def test_debug(self):
+        game = Game.from_string(PUZZLE, mrv=True, propagate=True,
+                                tracer=DebugTracer())
+
+        with self.assertLogs(level=logging.DEBUG) as logs:
+            game.solve()
+
+        messages = [record.getMessage() for record in logs.records]
+        self.assertIn('Sorting by min possibilities remaining', messages)
+        self.assertIn('Backtracking!', messages)
+        self.assertTrue(any(message.startswith('Propagation set position')
+                            for message in messages))
@@ -0,0 +1,89 @@
+import io
+import unittest
+
+from sudoku import (Game, check_solution, check_solution_batch, numpy,
+                    open_puzzles, validate_puzzles)
+
+
+SOLUTION = ('417369825632158947958724316825437169791586432346912758'
+            '289643571573291684164875293')
+
+
+def replace(puzzle, index, char):
+    return puzzle[:index] + char + puzzle[index + 1:]
+
+
+class TestCheckSolution(unittest.TestCase):
+
+    def test_valid(self):
+        self.assertIsNone(check_solution(SOLUTION))
+        self.assertIsNone(check_solution('1234341221434321'))
+
+    def test_reasons(self):
+        self.assertEqual(check_solution(SOLUTION[:80]), 'invalid length 80')
+        self.assertEqual(check_solution(replace(SOLUTION, 10, '0')),
+                         'empty position at (1, 1)')
+        self.assertEqual(check_solution(replace(SOLUTION, 10, '.')),
+                         'empty position at (1, 1)')
+        self.assertEqual(check_solution(replace(SOLUTION, 2, 'A')),
+                         "invalid value 'A' at (0, 2)")
+        # 4 swapped with 1 on the first line, which still has every value
+        self.assertEqual(check_solution('147' + SOLUTION[3:]),
+                         'repeated value on column 0, missing 4')
+
+    def test_is_valid_zeros(self):
+        # A single blank used to pass, as the zeros check compared values
+        # with positions
+        game = Game.from_string(replace(SOLUTION, 40, '0'))
+        self.assertFalse(game.is_valid())
+        self.assertTrue(Game.from_string(SOLUTION).is_valid())
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class TestCheckSolutionBatch(unittest.TestCase):
+
+    def test_batch(self):
+        puzzles = [SOLUTION, replace(SOLUTION, 80, '0'),
+                   replace(SOLUTION, 80, 'x'), '147' + SOLUTION[3:],
+                   SOLUTION.replace('1', 'a')]
+        self.assertEqual(check_solution_batch(puzzles),
+                         [True, False, False, False, False])
+
+
+class TestValidatePuzzles(unittest.TestCase):
+
+    def test_stream(self):
+        puzzles = ([SOLUTION] * 5 + [replace(SOLUTION, 0, '0')] +
+                   ['1234341221434321', '1234341221434312'])
+        results = list(validate_puzzles(iter(puzzles), batch_size=3))
+        self.assertEqual([game_id for game_id, reason in results],
+                         list(range(1, 9)))
+        self.assertEqual([(game_id, reason) for game_id, reason in results
+                          if reason is not None],
+                         [(6, 'empty position at (0, 0)'),
+                          (8, 'repeated value on column 2, missing 2')])
+
+    def test_malformed_input(self):
+        lines = u'%s\n%s\n%s\n' % (SOLUTION, SOLUTION[:80], SOLUTION)
+        puzzle_format, puzzles = open_puzzles(io.StringIO(lines),
+                                              strict=False)
+        self.assertEqual(
+            [(game_id, reason) for game_id, reason
+             in validate_puzzles(puzzles) if reason is not None],
+            [(2, 'invalid length 80')])
+
+        grid = [' '.join(SOLUTION[start:start + 9])
+                for start in range(0, 81, 9)]
+        bad = list(grid)
+        bad[4] = bad[4][:-2]
+        bad[6] = bad[6][:-1] + '12'
+        text = u'\n\n'.join('\n'.join(lines) for lines in (grid, bad, grid))
+        puzzle_format, puzzles = open_puzzles(io.StringIO(text),
+                                              strict=False)
+        self.assertEqual(
+            [(game_id, reason) for game_id, reason
+             in validate_puzzles(puzzles) if reason is not None],
+            [(2, 'invalid length 80')])
+
+        with self.assertRaises(ValueError):
+            list(open_puzzles(io.StringIO(lines))[1])